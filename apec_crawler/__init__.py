@@ -0,0 +1,8 @@
+# Crawl des offres d'emploi cadres d'apec.fr.
+# Le paquet s'importe sans Selenium ni pandas : le navigateur n'est chargé qu'à la création
+# du premier pilote, pandas qu'au calcul des champs dérivés avant l'écriture des exports.
+# Point d'entrée : python -m apec_crawler {daily,full,resume,replay,export}
+from .config import CrawlConfig
+from .offer_record import OfferRecord, OFFER_FIELDS
+
+__all__ = ['CrawlConfig', 'OfferRecord', 'OFFER_FIELDS']
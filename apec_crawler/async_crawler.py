@@ -0,0 +1,142 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from .metrics import metrics, timed_call
+from .parse_stage import parse_process_pool
+
+
+# Moteur de crawl asyncio : une file pour les pages de liste, une autre pour les offres.
+# Les fonctions de récupération sont synchrones (Selenium, requests) et tournent dans des threads.
+# Si parse_offer est fourni, process_offer ne renvoie que le HTML brut et l'analyse
+# (parse_offer(offer_link, html)) est confiée à un pool de processus.
+class AsyncCrawler:
+    def __init__(self, fetch_listing, process_offer, concurrency=10, listing_workers=2, detail_queue_size=None, parse_offer=None, parse_workers=None):
+        self.fetch_listing = fetch_listing
+        self.process_offer = process_offer
+        self.parse_offer = parse_offer
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self.concurrency = concurrency
+        self.listing_workers = listing_workers
+        # File d'offres bornée : les pages de liste gardent de l'avance sans accumuler sans limite
+        self.detail_queue_size = detail_queue_size or concurrency * 20
+
+    # Parcourir les pages [(numéro, url), ...] ; on_offer est appelé pour chaque offre,
+    # on_progress avec le numéro de la première page non terminée.
+    # Renvoie les numéros des pages de liste qui n'ont pas pu être récupérées.
+    def run(self, pages, on_offer, on_progress=None):
+        return asyncio.run(self._run(list(pages), on_offer, on_progress))
+
+    async def _run(self, pages, on_offer, on_progress):
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._parse_pool = parse_process_pool(self.parse_workers) if self.parse_offer else None
+        # Nombre de pages en attente d'analyse : au-delà, les récupérations attendent
+        self._parse_slots = asyncio.Semaphore(self.parse_workers * 2)
+        self._on_offer = on_offer
+        self._on_progress = on_progress
+        self._page_order = [page_number for page_number, _ in pages]
+        self._pending = {}
+        self._finished_pages = set()
+        self._cursor_index = 0
+        self.failed_pages = []
+
+        listing_queue = asyncio.Queue()
+        detail_queue = asyncio.Queue(maxsize=self.detail_queue_size)
+        for page in pages:
+            listing_queue.put_nowait(page)
+
+        listing_tasks = [asyncio.create_task(self._listing_worker(listing_queue, detail_queue)) for _ in range(self.listing_workers)]
+        detail_tasks = [asyncio.create_task(self._detail_worker(detail_queue)) for _ in range(self.concurrency)]
+        workers = listing_tasks + detail_tasks
+        joined = asyncio.create_task(self._join(listing_queue, detail_queue))
+        try:
+            await asyncio.wait([joined, *workers], return_when=asyncio.FIRST_COMPLETED)
+            # Un worker ne s'arrête que si on_offer ou on_progress échoue (disque plein, ...) :
+            # le crawl est interrompu et l'erreur remonte à l'appelant
+            for task in workers:
+                if task.done() and not task.cancelled() and task.exception() is not None:
+                    raise task.exception()
+        finally:
+            for task in [joined, *workers]:
+                task.cancel()
+            await asyncio.gather(joined, *workers, return_exceptions=True)
+            self._executor.shutdown(wait=True)
+            if self._parse_pool is not None:
+                self._parse_pool.shutdown(wait=True)
+        return sorted(self.failed_pages)
+
+    @staticmethod
+    async def _join(listing_queue, detail_queue):
+        await listing_queue.join()
+        await detail_queue.join()
+
+    async def _call(self, url, function):
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, function, url)
+
+    async def _parse(self, offer_link, html_content):
+        async with self._parse_slots:
+            loop = asyncio.get_running_loop()
+            job_data, elapsed, error_type = await loop.run_in_executor(self._parse_pool, timed_call, self.parse_offer, offer_link, html_content)
+            metrics.record_call('parse', elapsed, error_type)
+            return job_data
+
+    async def _listing_worker(self, listing_queue, detail_queue):
+        while True:
+            page_number, url = await listing_queue.get()
+            try:
+                try:
+                    offer_links = list(await self._call(url, self.fetch_listing))
+                except Exception as e:
+                    # Une page non lue n'est pas terminée : le curseur de progression ne la dépasse pas
+                    print(f"Erreur lors de la récupération de la page {page_number} : {str(e)}")
+                    self.failed_pages.append(page_number)
+                    continue
+
+                metrics.inc('listing_pages_total')
+                metrics.set_gauge('queue_depth', listing_queue.qsize(), queue='listing')
+                self._pending[page_number] = len(offer_links)
+                if not offer_links:
+                    self._page_done(page_number)
+                for offer_link in offer_links:
+                    await detail_queue.put((page_number, offer_link))
+            finally:
+                listing_queue.task_done()
+
+    async def _detail_worker(self, detail_queue):
+        while True:
+            page_number, offer_link = await detail_queue.get()
+            try:
+                try:
+                    job_data = await self._call(offer_link, self.process_offer)
+                    if self._parse_pool is not None and job_data is not None:
+                        job_data = await self._parse(offer_link, job_data)
+                except Exception as e:
+                    print(f"Erreur lors du traitement de l'offre {offer_link} : {str(e)}")
+                    job_data = None
+                metrics.set_gauge('queue_depth', detail_queue.qsize(), queue='detail')
+                if job_data:
+                    metrics.inc('offers_total')
+                    self._on_offer(job_data)
+
+                self._pending[page_number] -= 1
+                if self._pending[page_number] == 0:
+                    self._page_done(page_number)
+            finally:
+                detail_queue.task_done()
+
+    # Faire avancer le curseur de progression sur les pages terminées sans trou
+    def _page_done(self, page_number):
+        self._finished_pages.add(page_number)
+        advanced = False
+        while self._cursor_index < len(self._page_order) and self._page_order[self._cursor_index] in self._finished_pages:
+            self._finished_pages.discard(self._page_order[self._cursor_index])
+            self._cursor_index += 1
+            advanced = True
+        if advanced and self._on_progress:
+            if self._cursor_index < len(self._page_order):
+                next_page = self._page_order[self._cursor_index]
+            else:
+                next_page = self._page_order[-1] + 1
+            self._on_progress(next_page)
@@ -0,0 +1,110 @@
+import json
+import os
+from .offer_record import record_to_json
+
+
+# Journal de reprise : une offre par ligne ajoutée en fin de fichier, et un petit fichier
+# séparé pour le numéro de la prochaine page à traiter
+class CheckpointLog:
+    def __init__(self, log_path, cursor_path, fsync_every=100):
+        self.log_path = log_path
+        self.cursor_path = cursor_path
+        # Nombre d'enregistrements entre deux fsync du journal
+        self.fsync_every = fsync_every
+        self._file = None
+        self._unsynced = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _open(self):
+        if self._file is None:
+            # Compléter une dernière ligne tronquée par un arrêt brutal
+            needs_newline = False
+            if os.path.exists(self.log_path) and os.path.getsize(self.log_path) > 0:
+                with open(self.log_path, 'rb') as file:
+                    file.seek(-1, os.SEEK_END)
+                    needs_newline = file.read(1) != b'\n'
+            self._file = open(self.log_path, 'a', encoding='utf-8')
+            if needs_newline:
+                self._file.write('\n')
+        return self._file
+
+    def append(self, record):
+        file = self._open()
+        file.write(json.dumps(record, ensure_ascii=False, default=record_to_json) + '\n')
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every:
+            self.sync()
+
+    def sync(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    # Le curseur n'est écrit qu'après le journal, puis remplacé de façon atomique
+    def save_cursor(self, current_page):
+        self.sync()
+        tmp_path = self.cursor_path + '.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump({'current_page': current_page}, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.cursor_path)
+
+    def has_progress(self):
+        return os.path.exists(self.cursor_path) or os.path.exists(self.log_path)
+
+    # Repartir de zéro : le journal et le curseur sont supprimés
+    def reset(self):
+        self.close()
+        for path in (self.log_path, self.cursor_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    # Les pages de résultats sont numérotées à partir de 0, comme sur apec.fr
+    def load_cursor(self, default=0):
+        try:
+            with open(self.cursor_path, 'r') as file:
+                return json.load(file)['current_page']
+        except FileNotFoundError:
+            return default
+
+    # Relire le journal en flux, sans charger toutes les offres en mémoire.
+    # Les doublons (offres d'une page reprise après un arrêt) sont ignorés.
+    def iter_records(self, key='reference_apec'):
+        self.sync()
+        if not os.path.exists(self.log_path):
+            return
+        seen = set()
+        with open(self.log_path, 'r', encoding='utf-8') as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                record_key = record.get(key) if key else None
+                if record_key and record_key != '.':
+                    if record_key in seen:
+                        continue
+                    seen.add(record_key)
+                yield record
+
+    def close(self):
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+
+# Convertir une ancienne sauvegarde JSON complète vers le journal
+def import_legacy_progress(legacy_path, checkpoint):
+    with open(legacy_path, 'r') as file:
+        progress = json.load(file)
+    for record in progress.get('data', []):
+        checkpoint.append(record)
+    checkpoint.save_cursor(progress.get('current_page', 0))
@@ -0,0 +1,128 @@
+import argparse
+from .config import CrawlConfig, BACKENDS, SINKS, LISTING_MODES, EXPORT_SOURCES
+from .offer_record import OFFER_FIELDS
+
+MODES = {
+    'daily': "offres publiées depuis moins de 24 heures, vers les exports et job_offers.db",
+    'full': "crawl complet de toutes les pages de résultats, depuis la première page",
+    'resume': "reprise du crawl complet à la page enregistrée dans le journal de reprise",
+    'replay': "ré-analyse des pages d'offres du cache HTML, sans accès réseau",
+    'export': "exports seuls, depuis le journal de reprise, les journaux des nœuds ou la base",
+}
+
+
+def comma_list(value):
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+# Options communes à tous les modes ; une option absente garde la valeur par défaut du mode
+def common_options():
+    parser = argparse.ArgumentParser(add_help=False)
+    group = parser.add_argument_group("exports")
+    group.add_argument('--sinks', type=comma_list, help=f"exports séparés par des virgules parmi {', '.join(SINKS)}")
+    group.add_argument('--fields', type=comma_list, help="champs exportés, séparés par des virgules (par défaut tous)")
+    group.add_argument('--export-name', help="nom des fichiers d'export, sans extension")
+    group.add_argument('--export-max-rows', type=int, help="nombre maximal de lignes par fichier d'export")
+    group.add_argument('--db', dest='db_path', help="base SQLite des offres")
+    group = parser.add_argument_group("exécution")
+    group.add_argument('--parse-workers', type=int, help="processus d'analyse des pages (par défaut un par cœur)")
+    group.add_argument('--metrics-port', type=int, help="port du point d'accès /metrics")
+    group.add_argument('--metrics-summary', dest='metrics_summary_file', help="fichier du résumé des mesures")
+    group.add_argument('--cache-dir', dest='html_cache_dir', help="répertoire du cache HTML")
+    return parser
+
+
+# Options des modes qui accèdent au site
+def crawl_options():
+    parser = argparse.ArgumentParser(add_help=False)
+    group = parser.add_argument_group("crawl")
+    group.add_argument('--search-url', help="URL de la recherche, sans numéro de page")
+    group.add_argument('--concurrency', type=int, help="pages récupérées simultanément (et taille du pool de navigateurs)")
+    group.add_argument('--backend', choices=BACKENDS, help="backend des pages d'offre")
+    group.add_argument('--listing-backend', choices=BACKENDS, help="backend des pages de résultats")
+    group.add_argument('--rate', dest='rate_per_host', type=float, help="débit initial vers apec.fr (requêtes/s)")
+    group.add_argument('--target-latency', type=float, help="temps de réponse HTTP (s) au-delà duquel le débit baisse")
+    group.add_argument('--browser-target-latency', type=float, help="temps de rendu dans un navigateur (s) au-delà duquel le débit baisse")
+    group.add_argument('--max-retries', type=int, help="nouvelles tentatives avant d'abandonner une page")
+    group.add_argument('--max-pages', type=int, help="nombre maximal de pages de résultats")
+    group.add_argument('--full-browser', dest='lean_browser', action='store_false', default=None,
+                       help="navigateur complet au lieu du profil allégé")
+    group.add_argument('--dead-letters', dest='dead_letter_file', help="fichier des pages abandonnées")
+    return parser
+
+
+# Options du journal de reprise et du mode réparti
+def checkpoint_options():
+    parser = argparse.ArgumentParser(add_help=False)
+    group = parser.add_argument_group("reprise")
+    group.add_argument('--checkpoint', dest='checkpoint_file', help="journal des offres récupérées")
+    group.add_argument('--cursor', dest='cursor_file', help="fichier du numéro de la prochaine page")
+    group.add_argument('--shard-queue', dest='shard_queue_file', help="file partagée des plages de pages (mode réparti)")
+    group.add_argument('--shard-range-size', type=int, help="nombre de pages par plage")
+    group.add_argument('--shard-results', dest='shard_results_dir', help="répertoire des journaux des nœuds")
+    return parser
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='apec_crawler', description="Crawl des offres d'emploi cadres d'apec.fr")
+    subparsers = parser.add_subparsers(dest='mode', metavar='mode', required=True)
+    common, crawl, checkpoint = common_options(), crawl_options(), checkpoint_options()
+
+    daily = subparsers.add_parser('daily', parents=[common, crawl], help=MODES['daily'])
+    daily.add_argument('--listing-mode', choices=LISTING_MODES, help="parcours des pages de résultats")
+    daily.add_argument('--listing-workers', type=int, help="pages de résultats récupérées simultanément")
+    daily.add_argument('--all-offers', dest='incremental', action='store_false', default=None,
+                       help="récupérer aussi les offres déjà présentes dans la base")
+    daily.add_argument('--recheck-known', action='store_true', default=None,
+                       help="relire les offres connues et remplacer celles qui ont changé")
+
+    full = subparsers.add_parser('full', parents=[common, crawl, checkpoint], help=MODES['full'])
+    full.add_argument('--restart', action='store_true', help="effacer le journal de reprise existant")
+    subparsers.add_parser('resume', parents=[common, crawl, checkpoint], help=MODES['resume'])
+    subparsers.add_parser('replay', parents=[common], help=MODES['replay'])
+
+    export = subparsers.add_parser('export', parents=[common, checkpoint], help=MODES['export'])
+    export.add_argument('--source', choices=EXPORT_SOURCES, default='checkpoint', help="origine des offres exportées")
+    return parser
+
+
+# Réglages du mode, remplacés par les options données sur la ligne de commande
+def config_from_args(args):
+    skipped = ('mode', 'restart', 'source')
+    options = {name: value for name, value in vars(args).items() if name not in skipped and value is not None}
+    unknown_sinks = set(options.get('sinks', ())) - set(SINKS)
+    if unknown_sinks:
+        raise ValueError(f"Exports inconnus : {', '.join(sorted(unknown_sinks))}")
+    unknown_fields = set(options.get('fields', ())) - set(OFFER_FIELDS)
+    if unknown_fields:
+        raise ValueError(f"Champs inconnus : {', '.join(sorted(unknown_fields))}")
+    return CrawlConfig.for_mode(args.mode, **options)
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        config = config_from_args(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+    # Chaque mode n'importe que ce dont il a besoin
+    if args.mode == 'daily':
+        from .daily import run_daily
+        run_daily(config)
+    elif args.mode == 'replay':
+        from .daily import run_replay
+        run_replay(config)
+    elif args.mode == 'export':
+        from .full import run_export
+        run_export(config, args.source)
+    else:
+        from .checkpoint import CheckpointLog
+        from .full import run_full
+
+        restart = args.mode == 'full'
+        if restart and not config.shard_queue_file and not args.restart and CheckpointLog(config.checkpoint_file, config.cursor_file).has_progress():
+            parser.error(f"un crawl est déjà en cours dans {config.checkpoint_file} : utiliser 'resume' pour le reprendre, ou 'full --restart' pour repartir de zéro")
+        run_full(config, restart=restart)
+    return 0
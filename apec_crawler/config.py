@@ -0,0 +1,138 @@
+from datetime import datetime
+from .offer_record import OFFER_FIELDS
+
+# Recherche des offres cadres (types de contrat retenus) ; les pages sont numérotées par ?page=N
+SEARCH_URL = 'https://www.apec.fr/candidat/recherche-emploi.html/emploi?typesConvention=143684&typesConvention=143685&typesConvention=143686&typesConvention=143687&typesConvention=143706'
+# Filtre des offres publiées depuis moins de 24 heures
+LAST_24_HOURS = '&anciennetePublication=101850'
+
+# Backends de récupération : 'http' (requests seul), 'selenium' (navigateur) ou 'fallback'
+# (requests, puis navigateur en cas d'échec)
+BACKENDS = ('http', 'selenium', 'fallback')
+# Exports disponibles ; 'sqlite' et 'history' écrivent dans job_offers.db
+SINKS = ('csv', 'xlsx', 'parquet', 'sqlite', 'history')
+# Parcours des pages de résultats du mode quotidien
+LISTING_MODES = ('pages', 'click', 'delta')
+# Sources du mode export : journal de reprise, journaux des nœuds ou job_offers.db
+EXPORT_SOURCES = ('checkpoint', 'shards', 'db')
+
+# Réglages communs à tous les modes
+DEFAULTS = {
+    # Pages récupérées simultanément, processus d'analyse (None : un par cœur) et backends
+    'concurrency': 10,
+    'parse_workers': None,
+    'backend': 'fallback',
+    'listing_backend': 'fallback',
+    # Profil allégé des navigateurs (images, polices, feuilles de style et traceurs bloqués)
+    'lean_browser': True,
+
+    # Ordonnanceur : débit initial par hôte (requêtes/s), nouvelles tentatives et URL abandonnées.
+    # Le débit baisse quand une page met plus de target_latency secondes à arriver en HTTP,
+    # ou browser_target_latency secondes à être rendue par un navigateur.
+    'rate_per_host': 5,
+    'target_latency': 2.0,
+    'browser_target_latency': 15.0,
+    'max_retries': 4,
+    'dead_letter_file': 'dead_letters.jsonl',
+
+    # Cache des pages HTML : durée de validité (secondes) et taille maximale (octets), None : sans limite.
+    # Les pages récupérées y sont toujours enregistrées ; cache_reads : les pages d'offre encore
+    # valides y sont relues au lieu d'être récupérées (reprise d'un crawl interrompu)
+    'html_cache_dir': 'html_cache',
+    'html_cache_ttl': None,
+    'html_cache_max_bytes': None,
+    'cache_reads': False,
+
+    # Base SQLite : taille des lots d'insertion et niveau de synchronisation (OFF, NORMAL, FULL)
+    'db_path': 'job_offers.db',
+    'db_batch_size': 500,
+    'db_synchronous': 'NORMAL',
+
+    # Recherche et parcours des résultats ; max_pages None : jusqu'à la dernière page
+    'search_url': SEARCH_URL,
+    'listing_mode': 'pages',
+    'listing_workers': 4,
+    'max_pages': None,
+    # Mode incrémental : ne récupérer que les offres absentes de la base.
+    # Avec recheck_known, les offres connues sont relues et mises à jour si leur contenu a changé.
+    'incremental': True,
+    'recheck_known': False,
+    # Nom du repère du parcours 'delta' dans la table crawl_state
+    'high_water_mark_name': 'listing_high_water_mark',
+
+    # Exports : champs, nom des fichiers (sans extension), lignes par fichier et exports actifs
+    'fields': list(OFFER_FIELDS),
+    'export_name': 'offres_emploi',
+    'export_max_rows': 500000,
+    'sinks': ('csv', 'xlsx'),
+
+    # Crawl complet : journal des offres, numéro de la prochaine page et ancienne sauvegarde JSON
+    'checkpoint_file': 'scraping_progress_2024.jsonl',
+    'cursor_file': 'scraping_progress_2024.cursor.json',
+    'progress_file': 'scraping_progress_2024.json',
+    # Mode réparti : file des plages de pages (None pour un seul processus), taille des plages
+    # et répertoire des journaux des nœuds
+    'shard_queue_file': None,
+    'shard_range_size': 50,
+    'shard_results_dir': 'shard_results',
+
+    # Port du point d'accès /metrics (None : pas de serveur) et résumé écrit en fin d'exécution
+    'metrics_port': None,
+    'metrics_summary_file': 'metrics_summary.json',
+}
+
+
+# Réglages propres à chaque mode, appliqués par-dessus DEFAULTS
+# Les exports du mode quotidien et de la relecture ne contiennent que les offres de l'exécution :
+# leur nom est horodaté pour qu'une deuxième exécution le même jour n'écrase pas la première
+def mode_defaults(mode, now=None):
+    now = now or datetime.now()
+    today = now.strftime('%Y%m%d')
+    if mode in ('daily', 'replay'):
+        return {
+            'search_url': SEARCH_URL + LAST_24_HOURS,
+            'html_cache_ttl': 30 * 24 * 3600,
+            'html_cache_max_bytes': 20 * 1024 ** 3,
+            'export_name': f"{'offres_emploi' if mode == 'daily' else 'offres_relues'}_{now.strftime('%Y%m%d_%H%M%S')}",
+            'sinks': ('csv', 'xlsx', 'sqlite') + (('history',) if mode == 'daily' else ()),
+            'metrics_summary_file': f"metrics_summary_{today}.json",
+        }
+    if mode in ('full', 'resume', 'export'):
+        return {
+            # Seule la reprise relit le cache : un nouveau crawl ou une relecture des offres connues
+            # doit voir le contenu actuel des pages
+            'cache_reads': mode == 'resume',
+            'listing_backend': 'selenium',
+            'max_pages': 7751,
+            'dead_letter_file': 'dead_letters_2024.jsonl',
+            'html_cache_max_bytes': 50 * 1024 ** 3,
+            'export_name': 'officiel_data_2024P',
+            'sinks': ('csv', 'xlsx', 'parquet'),
+            'metrics_summary_file': 'metrics_summary_2024.json',
+        }
+    raise ValueError(f"Mode inconnu : {mode}")
+
+
+# Réglages d'une exécution : DEFAULTS, complétés par ceux du mode puis par les options données
+class CrawlConfig:
+    def __init__(self, **options):
+        for name, default in DEFAULTS.items():
+            setattr(self, name, options.pop(name, default))
+        if options:
+            raise TypeError(f"Réglages inconnus : {', '.join(options)}")
+
+    @classmethod
+    def for_mode(cls, mode, **options):
+        return cls(**{**mode_defaults(mode), **options})
+
+    # Modèles d'URL des pages de résultats, dans l'ordre du site ou du plus récent au plus ancien
+    @property
+    def search_page_url(self):
+        return self.search_url + '&page={page_number}'
+
+    @property
+    def search_by_date_page_url(self):
+        return self.search_url + '&sortsType=DATE&page={page_number}'
+
+    def __repr__(self):
+        return 'CrawlConfig(' + ', '.join(f"{name}={getattr(self, name)!r}" for name in DEFAULTS) + ')'
@@ -0,0 +1,125 @@
+import sqlite3
+from datetime import datetime
+from .config import LAST_24_HOURS
+from .db_writer import create_job_offers_table
+from .exports import write_offers, export_paths
+from .html_cache import replay_offers
+from .offer_history import OfferHistory
+from .offer_index import OfferIndex, load_state, save_state, ref_from_url
+from .pagination import get_offer_links_by_click, click_cookie_banner, get_offer_links_by_page, get_offer_links_since
+from .parse_stage import ParsePipeline
+from .runtime import CrawlRuntime
+
+
+# Parcours en un seul navigateur, avec acceptation de la bannière des cookies
+def list_offers_by_click(runtime):
+    with runtime.driver_pool.lease() as driver:
+        driver.get(runtime.config.search_url)
+        if runtime.browser_profile is None or not runtime.browser_profile.accept_cookies:
+            click_cookie_banner(driver)
+        return get_offer_links_by_click(driver)
+
+
+# Liens des offres publiées depuis moins de 24 heures, selon config.listing_mode.
+# Renvoie aussi le nouveau repère du parcours 'delta' (None sinon).
+def list_offers(runtime, offer_index):
+    config = runtime.config
+    if config.listing_mode == 'click':
+        return list_offers_by_click(runtime), None
+    listing_fetcher = runtime.listing_fetcher()
+    if config.listing_mode == 'delta':
+        previous_ref = load_state(config.db_path, config.high_water_mark_name)
+        print(f"Parcours depuis la dernière exécution (dernière offre vue : {previous_ref}).")
+        return get_offer_links_since(config.search_by_date_page_url, listing_fetcher, offer_index.is_known, previous_ref,
+                                     max_pages=config.max_pages, workers=config.listing_workers)
+    return get_offer_links_by_page(config.search_page_url, listing_fetcher, max_pages=config.max_pages, workers=config.listing_workers), None
+
+
+# Un parcours couvre toutes les offres en ligne s'il lit toutes les pages d'une recherche
+# sans filtre de date : les offres connues qui n'y figurent pas ont été retirées du site
+def listing_is_complete(runtime):
+    config = runtime.config
+    if config.listing_mode != 'pages' or config.max_pages is not None or LAST_24_HOURS in config.search_url:
+        return False
+    return not any(ref_from_url(entry['url']) is None for entry in runtime.fetch_scheduler.dead_letters)
+
+
+# Crawl des offres : pages de résultats, filtrage incrémental, puis pages de détail.
+# Les threads ne font que récupérer les pages, l'analyse est faite par un pool de processus.
+# Renvoie le flux des offres, le nouveau repère du parcours 'delta' (None sinon) et les offres
+# vues dans les résultats : (début du parcours, références, parcours complet ou non).
+def crawl_daily(runtime):
+    config = runtime.config
+    # Offres et pages de résultats abandonnées lors de l'exécution précédente
+    retry_links = set(runtime.dead_letter_links())
+    offer_index = OfferIndex.load(config.db_path) if config.incremental or config.listing_mode == 'delta' else None
+
+    listed_at = datetime.now()
+    offer_links, high_water_ref = list_offers(runtime, offer_index)
+    sightings = (listed_at, {ref_from_url(link) for link in offer_links} - {None}, listing_is_complete(runtime))
+    print(f"{len(offer_links)} offres trouvées dans les résultats de recherche, {len(retry_links)} offres à relancer.")
+    offer_links = set(offer_links) | retry_links
+
+    # Écarter les offres déjà enregistrées avant de charger leur page de détail
+    if config.incremental:
+        new_links, known_links = offer_index.split(offer_links)
+        print(f"{len(new_links)} nouvelles offres, {len(known_links)} déjà connues.")
+        offer_links = new_links + known_links if config.recheck_known else new_links
+
+    pipeline = ParsePipeline(runtime.detail_fetcher(), fetch_workers=config.concurrency, parse_workers=config.parse_workers)
+    job_data_stream = pipeline.run(offer_links)
+
+    # Ne conserver des offres relues que celles dont le contenu a changé
+    if offer_index is not None and config.recheck_known:
+        job_data_stream = (job_data for job_data in job_data_stream if offer_index.has_changed(job_data))
+    return job_data_stream, high_water_ref, sightings
+
+
+# Historique : toutes les offres vues dans les résultats, y compris celles dont la page de détail
+# n'a pas été relue (offres connues, ou relues sans changement), restent en cours ;
+# après un parcours complet, les offres absentes sont closes.
+def record_sightings(config, sightings):
+    listed_at, refs, complete = sightings
+    with OfferHistory(config.db_path, batch_size=config.db_batch_size) as history:
+        history.record_sightings(refs, listed_at)
+        if complete:
+            history.close_unseen(listed_at)
+        stats = history.stats
+    print(f"Historique : {stats['unchanged']} offres revues sans relecture, {stats['reappeared']} offres revenues, {stats['removed']} offres retirées du site.")
+
+
+# Crawl quotidien : offres du jour vers les exports et job_offers.db
+def run_daily(config):
+    # Création de la table si elle n'existe pas déjà
+    with sqlite3.connect(config.db_path) as conn:
+        create_job_offers_table(conn)
+
+    with CrawlRuntime(config) as runtime:
+        job_data_stream, high_water_ref, sightings = crawl_daily(runtime)
+        # Les offres modifiées remplacent l'ancienne version en mode recheck_known
+        pipeline = write_offers(job_data_stream, config, replace=config.recheck_known)
+        if 'history' in config.sinks:
+            record_sightings(config, sightings)
+
+        # Le repère n'avance qu'une fois les offres enregistrées : un arrêt en cours de route les fera relire
+        if high_water_ref:
+            save_state(config.db_path, config.high_water_mark_name, high_water_ref)
+        # Idem pour les pages abandonnées : elles ne sont retirées de la liste qu'une fois relancées
+        runtime.drop_retried_dead_letters()
+
+        print(f"Les données de {pipeline.count} offres ont été enregistrées ({', '.join(config.sinks)}).")
+    return pipeline
+
+
+# Relecture : les pages d'offres du cache sont ré-analysées sans accès réseau.
+# Les pages relues ne sont pas datées du jour : l'historique n'est pas alimenté.
+def run_replay(config):
+    if 'history' in config.sinks:
+        print("L'historique des versions n'est pas alimenté en relecture.")
+        config.sinks = tuple(name for name in config.sinks if name != 'history')
+
+    with CrawlRuntime(config) as runtime:
+        job_data_stream = replay_offers(runtime.html_cache, parse_workers=config.parse_workers)
+        pipeline = write_offers(job_data_stream, config, replace=True)
+        print(f"{pipeline.count} offres relues depuis le cache et enregistrées dans {', '.join(export_paths(pipeline)) or config.db_path}.")
+    return pipeline
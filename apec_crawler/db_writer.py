@@ -0,0 +1,136 @@
+import sqlite3
+from .offer_index import ensure_index_schema
+from .offer_search import ensure_search_schema
+from .metrics import metrics
+
+# Colonnes de la table job_offers et clé correspondante dans les données d'une offre
+JOB_OFFER_COLUMNS = [
+    ('ref_apec', 'reference_apec'),
+    ('url', 'url'),
+    ('company_name', 'company_name'),
+    ('statut_poste', 'statut_poste'),
+    ('location', 'location'),
+    ('ville', 'ville'),
+    ('departement', 'departement'),
+    ('salary_raw', 'salary_raw'),
+    ('salary_average', 'salary_average'),
+    ('salary_minimum', 'salary_minimum'),
+    ('date_publication', 'date_publication'),
+    ('mois_publication', 'mois_publication'),
+    ('experience', 'experience'),
+    ('experience_value', 'experience_value'),
+    ('travel_zone', 'travel_zone'),
+    ('langues', 'langues'),
+    ('metier', 'metier'),
+    ('secteur_activite', 'secteur_activite'),
+    ('teletravail', 'teletravail'),
+    ('description', 'description'),
+    ('content_hash', 'content_hash'),
+]
+
+
+# Création de la table si elle n'existe pas déjà
+def create_job_offers_table(conn):
+    conn.execute('''CREATE TABLE IF NOT EXISTS job_offers
+             (ref_apec TEXT PRIMARY KEY, url TEXT, company_name TEXT, statut_poste TEXT, location TEXT, ville TEXT, departement TEXT, salary_raw TEXT, salary_average TEXT, salary_minimum TEXT, date_publication TEXT, mois_publication TEXT, experience TEXT, experience_value TEXT, travel_zone TEXT, langues TEXT, metier TEXT, secteur_activite TEXT, teletravail TEXT, description TEXT, content_hash TEXT)''')
+    ensure_index_schema(conn)
+    ensure_search_schema(conn)
+
+
+# Écriture groupée : une transaction et un executemany par lot d'offres
+class BulkWriter:
+    def __init__(self, db_path, batch_size=500, synchronous='NORMAL', journal_mode='WAL', replace=False, on_batch=None):
+        self.batch_size = batch_size
+        self.replace = replace
+        self.on_batch = on_batch or self._print_batch
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute(f'PRAGMA journal_mode={journal_mode}')
+        self.conn.execute(f'PRAGMA synchronous={synchronous}')
+        create_job_offers_table(self.conn)
+
+        insert_mode = 'INSERT OR REPLACE' if replace else 'INSERT OR IGNORE'
+        columns = ', '.join(column for column, _ in JOB_OFFER_COLUMNS)
+        placeholders = ', '.join('?' for _ in JOB_OFFER_COLUMNS)
+        self.insert_sql = f'{insert_mode} INTO job_offers ({columns}) VALUES ({placeholders})'
+
+        self._batch = []
+        self.batch_count = 0
+        self.inserted = 0
+        self.ignored = 0
+        self.failed = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @staticmethod
+    def _row(data):
+        return tuple(data.get(key) for _, key in JOB_OFFER_COLUMNS)
+
+    # Ajouter une offre ; le lot est écrit dès qu'il est plein
+    def add(self, data):
+        self._batch.append(self._row(data))
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    # Consommer un itérable (liste ou générateur) au fil de l'eau
+    def write(self, job_data_list):
+        for data in job_data_list:
+            self.add(data)
+        self.flush()
+        return {'inserted': self.inserted, 'ignored': self.ignored, 'failed': self.failed}
+
+    def flush(self):
+        if not self._batch:
+            return
+        rows, self._batch = self._batch, []
+        # rowcount plutôt que total_changes : les écritures des triggers (index plein texte) ne comptent pas
+        inserted = 0
+        failed = 0
+        try:
+            with self.conn:
+                inserted = self.conn.executemany(self.insert_sql, rows).rowcount
+        except sqlite3.Error as e:
+            # Rejouer le lot ligne par ligne pour isoler les offres invalides
+            print(f"Erreur lors de l'insertion d'un lot, nouvelle tentative ligne par ligne : {str(e)}")
+            for row in rows:
+                try:
+                    with self.conn:
+                        inserted += self.conn.execute(self.insert_sql, row).rowcount
+                except sqlite3.Error as row_error:
+                    failed += 1
+                    print(f"Erreur lors de l'insertion des données dans la base de données : {str(row_error)}")
+
+        ignored = len(rows) - inserted - failed
+        self.batch_count += 1
+        self.inserted += inserted
+        self.ignored += ignored
+        self.failed += failed
+        metrics.inc('db_rows_total', inserted, result='inserted')
+        metrics.inc('db_rows_total', ignored, result='ignored')
+        metrics.inc('db_rows_total', failed, result='failed')
+        self.on_batch({'batch': self.batch_count, 'rows': len(rows), 'inserted': inserted, 'ignored': ignored, 'failed': failed})
+
+    @staticmethod
+    def _print_batch(stats):
+        print(f"Lot {stats['batch']} : {stats['inserted']} insérées, {stats['ignored']} ignorées, {stats['failed']} en erreur.")
+
+    def close(self):
+        if self.conn is not None:
+            self.flush()
+            self.conn.close()
+            self.conn = None
+
+
+# Relire les offres enregistrées, avec les noms de champs des offres analysées
+def iter_job_offers(db_path):
+    columns = ', '.join(column for column, _ in JOB_OFFER_COLUMNS)
+    keys = [key for _, key in JOB_OFFER_COLUMNS]
+    conn = sqlite3.connect(db_path)
+    try:
+        for row in conn.execute(f'SELECT {columns} FROM job_offers ORDER BY rowid'):
+            yield dict(zip(keys, row))
+    finally:
+        conn.close()
@@ -0,0 +1,208 @@
+import base64
+import queue
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Domaines de mesure d'audience et de publicité chargés par apec.fr, inutiles pour lire le DOM
+TRACKER_HOSTS = (
+    'google-analytics.com', 'googletagmanager.com', 'doubleclick.net', 'googlesyndication.com',
+    'facebook.net', 'facebook.com', 'hotjar.com', 'linkedin.com', 'licdn.com', 'bing.com',
+    'criteo.com', 'criteo.net', 'adnxs.com', 'tiktok.com', 'xiti.com', 'atinternet.com',
+)
+
+# Site sur lequel le consentement aux cookies est enregistré à la création du navigateur
+CONSENT_URL = 'https://www.apec.fr/robots.txt'
+
+
+# Réglages d'un navigateur de crawl : types de ressources bloqués, stratégie de chargement,
+# caches et consentement aux cookies enregistré d'avance
+class BrowserProfile:
+    def __init__(self, block_images=True, block_stylesheets=True, block_fonts=True, block_trackers=True,
+                 page_load_strategy='eager', disk_cache=False, accept_cookies=True, tracker_hosts=TRACKER_HOSTS):
+        self.block_images = block_images
+        self.block_stylesheets = block_stylesheets
+        self.block_fonts = block_fonts
+        self.block_trackers = block_trackers
+        self.page_load_strategy = page_load_strategy
+        self.disk_cache = disk_cache
+        self.accept_cookies = accept_cookies
+        self.tracker_hosts = tracker_hosts
+
+    # Préférences Firefox correspondant au profil
+    def preferences(self):
+        preferences = {
+            # Pas de préchargement ni de connexions spéculatives vers des pages qui ne seront pas lues
+            'network.prefetch-next': False,
+            'network.dns.disablePrefetch': True,
+            'network.http.speculative-parallel-limit': 0,
+            'browser.sessionhistory.max_entries': 2,
+            'browser.sessionstore.resume_from_crash': False,
+            'media.autoplay.default': 5,
+            'dom.webnotifications.enabled': False,
+            'toolkit.telemetry.enabled': False,
+            'datareporting.healthreport.uploadEnabled': False,
+            'app.update.auto': False,
+        }
+        if not self.disk_cache:
+            preferences['browser.cache.disk.enable'] = False
+            preferences['browser.cache.offline.enable'] = False
+        if self.block_images:
+            preferences['permissions.default.image'] = 2
+        if self.block_stylesheets:
+            preferences['permissions.default.stylesheet'] = 2
+        if self.block_fonts:
+            preferences['browser.display.use_document_fonts'] = 0
+            preferences['gfx.downloadable_fonts.enabled'] = False
+        if self.block_trackers:
+            preferences['privacy.trackingprotection.enabled'] = True
+            preferences['privacy.trackingprotection.socialtracking.enabled'] = True
+            # Les domaines de TRACKER_HOSTS sont envoyés vers un proxy inexistant : la requête échoue aussitôt
+            preferences['network.proxy.type'] = 2
+            preferences['network.proxy.autoconfig_url'] = self.proxy_autoconfig_url()
+        return preferences
+
+    def proxy_autoconfig_url(self):
+        conditions = ' || '.join(f'host == "{host}" || dnsDomainIs(host, ".{host}")' for host in self.tracker_hosts)
+        script = f'function FindProxyForURL(url, host) {{ return ({conditions}) ? "PROXY 127.0.0.1:9" : "DIRECT"; }}'
+        return 'data:application/x-ns-proxy-autoconfig;base64,' + base64.b64encode(script.encode('utf-8')).decode('ascii')
+
+
+# Profil allégé utilisé par défaut pour le crawl
+LEAN_PROFILE = BrowserProfile()
+
+
+# Cookies OneTrust d'un visiteur ayant déjà fermé la bannière (cookies strictement nécessaires seulement)
+def consent_cookies(now=None):
+    now = now or datetime.now(timezone.utc)
+    timestamp = now.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+    consent = f"isGpcEnabled=0&datestamp={now.strftime('%a+%b+%d+%Y+%H:%M:%S')}&interactionCount=1&landingPath=NotLandingPage&groups=C0001:1,C0002:0,C0003:0,C0004:0"
+    return [{'name': 'OptanonAlertBoxClosed', 'value': timestamp}, {'name': 'OptanonConsent', 'value': consent}]
+
+
+# Enregistrer le consentement dans le navigateur : la bannière n'est plus affichée sur les pages suivantes
+def accept_cookie_banner(driver, consent_url=CONSENT_URL):
+    driver.get(consent_url)
+    for cookie in consent_cookies():
+        driver.add_cookie(cookie)
+
+
+# Création d'un navigateur Firefox en mode headless ; profile=None donne un navigateur complet
+def create_firefox_driver(page_load_timeout=100, profile=LEAN_PROFILE):
+    from selenium import webdriver
+    from selenium.common.exceptions import WebDriverException
+
+    options = webdriver.FirefoxOptions()
+    options.add_argument('-headless')
+    if profile is not None:
+        # 'eager' : get() rend la main dès que le DOM est prêt, sans attendre les ressources restantes
+        options.page_load_strategy = profile.page_load_strategy
+        for name, value in profile.preferences().items():
+            options.set_preference(name, value)
+    driver = webdriver.Firefox(options=options)
+    driver.set_page_load_timeout(page_load_timeout)
+    if profile is not None and profile.accept_cookies:
+        try:
+            accept_cookie_banner(driver)
+        except WebDriverException:
+            driver.quit()
+            raise
+    return driver
+
+
+# Pool borné de navigateurs : chaque navigateur est prêté à un seul thread à la fois
+class DriverPool:
+    def __init__(self, size=10, driver_factory=create_firefox_driver, max_uses=200, acquire_timeout=300):
+        self.size = size
+        self.driver_factory = driver_factory
+        # Nombre de pages après lequel un navigateur est recyclé (fuites mémoire de Firefox)
+        self.max_uses = max_uses
+        self.acquire_timeout = acquire_timeout
+        self._idle = queue.LifoQueue()
+        self._uses = {}
+        self._created = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    # Emprunter un navigateur pour la durée du bloc "with"
+    @contextmanager
+    def lease(self):
+        driver = self._acquire()
+        try:
+            yield driver
+        finally:
+            self._release(driver)
+
+    def _acquire(self):
+        if self._closed:
+            raise RuntimeError("Le pool de navigateurs est fermé.")
+
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+
+        if can_create:
+            try:
+                driver = self.driver_factory()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+            self._uses[id(driver)] = 0
+            return driver
+
+        try:
+            return self._idle.get(timeout=self.acquire_timeout)
+        except queue.Empty:
+            raise TimeoutError("Aucun navigateur disponible dans le pool.")
+
+    def _release(self, driver):
+        self._uses[id(driver)] = self._uses.get(id(driver), 0) + 1
+        if self._closed or not self._is_healthy(driver):
+            self._discard(driver)
+        else:
+            self._idle.put(driver)
+
+    # Vérifier qu'un navigateur répond encore et n'a pas ouvert d'onglets parasites
+    def _is_healthy(self, driver):
+        from selenium.common.exceptions import WebDriverException
+
+        if self._uses.get(id(driver), 0) >= self.max_uses:
+            return False
+        try:
+            return len(driver.window_handles) == 1
+        except WebDriverException:
+            return False
+
+    # Fermer un navigateur défaillant ; un nouveau sera créé à la prochaine demande
+    def _discard(self, driver):
+        from selenium.common.exceptions import WebDriverException
+
+        self._uses.pop(id(driver), None)
+        try:
+            driver.quit()
+        except WebDriverException:
+            pass
+        with self._lock:
+            self._created -= 1
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(driver)
@@ -0,0 +1,36 @@
+from .sinks import CsvSink, XlsxSink, ParquetSink, SqliteSink, HistorySink, SinkPipeline
+
+
+# Exports actifs de config.sinks, alimentés offre par offre.
+# replace : les offres déjà présentes dans la base sont remplacées par la nouvelle version.
+def create_sinks(config, replace=False):
+    sinks = []
+    for name in config.sinks:
+        if name == 'csv':
+            sinks.append(CsvSink(f"{config.export_name}.csv", config.fields, max_rows=config.export_max_rows))
+        elif name == 'xlsx':
+            sinks.append(XlsxSink(f"{config.export_name}.xlsx", config.fields, max_rows=config.export_max_rows))
+        elif name == 'parquet':
+            sinks.append(ParquetSink(f"{config.export_name}.parquet", config.fields, max_rows=config.export_max_rows))
+        elif name == 'sqlite':
+            sinks.append(SqliteSink(config.db_path, batch_size=config.db_batch_size, synchronous=config.db_synchronous, replace=replace))
+        elif name == 'history':
+            sinks.append(HistorySink(config.db_path, batch_size=config.db_batch_size))
+        else:
+            raise ValueError(f"Export inconnu : {name}")
+    return SinkPipeline(sinks)
+
+
+# Écrire un flux d'offres dans tous les exports actifs. Salaire, expérience, département et mois
+# sont calculés par paquets avant l'écriture (pandas n'est chargé qu'à ce moment).
+def write_offers(job_data_stream, config, replace=False):
+    from .offer_normalize import normalize_records
+
+    with create_sinks(config, replace=replace) as pipeline:
+        pipeline.write_all(normalize_records(job_data_stream))
+    return pipeline
+
+
+# Fichiers écrits par les exports fichier d'un pipeline terminé
+def export_paths(pipeline):
+    return [path for sink in pipeline.sinks for path in getattr(sink, 'paths', [])]
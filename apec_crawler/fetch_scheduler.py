@@ -0,0 +1,201 @@
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from urllib.parse import urlsplit
+from .fetchers import FetchError, RETRYABLE_STATUS_CODES, GONE_STATUS_CODES
+from .metrics import metrics
+
+try:
+    import fcntl
+except ImportError:
+    # Windows : pas de verrou entre processus, un seul nœud par répertoire
+    fcntl = None
+
+
+# Seau à jetons dont le débit s'adapte au site (AIMD) : augmentation additive tant que
+# les réponses sont rapides, réduction multiplicative en cas d'erreur ou de lenteur
+class AdaptiveTokenBucket:
+    def __init__(self, rate=5.0, min_rate=0.5, max_rate=50.0, target_latency=2.0, increase=0.5, decrease=0.5):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.target_latency = target_latency
+        self.increase = increase
+        self.decrease = decrease
+        self._tokens = 1.0
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    # Bloquer jusqu'à ce qu'un jeton soit disponible
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(max(1.0, self.rate), self._tokens + (now - self._last_refill) * self.rate)
+                self._last_refill = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    # target_latency : objectif propre au backend qui a servi la page (celui du seau sinon)
+    def on_success(self, latency, target_latency=None):
+        with self._lock:
+            if latency > (target_latency or self.target_latency):
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+            else:
+                # Environ +increase requête/s pour chaque seconde de trafic au débit courant
+                self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def on_failure(self):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+
+
+# Ordonnanceur central des récupérations : débit par hôte, nouvelles tentatives avec
+# attente exponentielle aléatoire, et liste des URL abandonnées à relancer plus tard
+class FetchScheduler:
+    def __init__(self, rate_per_host=5.0, max_retries=4, backoff_base=1.0, backoff_max=60.0, dead_letter_path=None, **bucket_options):
+        self.rate_per_host = rate_per_host
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.dead_letter_path = dead_letter_path
+        self.bucket_options = bucket_options
+        self.dead_letters = []
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = AdaptiveTokenBucket(rate=self.rate_per_host, **self.bucket_options)
+            return self._buckets[host]
+
+    # Backend dont les récupérations passent par l'ordonnanceur
+    def wrap(self, fetcher):
+        return ScheduledFetcher(fetcher, self)
+
+    def backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def fetch(self, fetcher, url):
+        bucket = self.bucket(url)
+        attempt = 0
+        while True:
+            bucket.acquire()
+            start = time.monotonic()
+            try:
+                html_content = fetcher.fetch(url)
+            except FetchError as e:
+                # Une erreur définitive n'indique pas une surcharge du site ;
+                # une offre retirée (404, 410) n'est pas à relancer
+                if e.status_code not in RETRYABLE_STATUS_CODES:
+                    if e.status_code not in GONE_STATUS_CODES:
+                        self._dead_letter(url, e, attempt + 1)
+                    raise
+                bucket.on_failure()
+                if attempt >= self.max_retries:
+                    self._dead_letter(url, e, attempt + 1)
+                    raise
+                delay = self.backoff(attempt)
+                metrics.inc('retries_total', status=e.status_code)
+                print(f"Échec de la récupération de {url} ({str(e)}), nouvelle tentative dans {delay:.1f} s.")
+                time.sleep(delay)
+                attempt += 1
+                continue
+            # Le temps de réponse est jugé selon le backend : un navigateur est lent sans que le site soit surchargé
+            bucket.on_success(time.monotonic() - start, getattr(fetcher, 'target_latency', None))
+            metrics.set_gauge('rate_per_host', round(bucket.rate, 3), host=urlsplit(url).netloc)
+            return html_content
+
+    def _dead_letter(self, url, error, attempts):
+        entry = {'url': url, 'error': str(error), 'status_code': error.status_code, 'attempts': attempts, 'failed_at': datetime.now().isoformat(timespec='seconds')}
+        metrics.inc('dead_letters_total')
+        with self._lock:
+            self.dead_letters.append(entry)
+            if self.dead_letter_path:
+                with dead_letter_lock(self.dead_letter_path), open(self.dead_letter_path, 'a', encoding='utf-8') as file:
+                    file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    # Débit courant par hôte (requêtes/s)
+    def rates(self):
+        with self._lock:
+            return {host: bucket.rate for host, bucket in self._buckets.items()}
+
+
+class ScheduledFetcher:
+    def __init__(self, fetcher, scheduler):
+        self.fetcher = fetcher
+        self.scheduler = scheduler
+
+    def fetch(self, url):
+        return self.scheduler.fetch(self.fetcher, url)
+
+
+# Verrou exclusif sur le fichier des pages abandonnées : plusieurs nœuds du mode réparti
+# peuvent partager le même répertoire de travail
+@contextmanager
+def dead_letter_lock(dead_letter_path):
+    if fcntl is None:
+        yield
+        return
+    with open(dead_letter_path + '.lock', 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _read_dead_letter_lines(dead_letter_path):
+    if not os.path.exists(dead_letter_path):
+        return []
+    with open(dead_letter_path, 'rb') as file:
+        return file.read().splitlines(keepends=True)
+
+
+# Relire la liste des URL abandonnées lors des exécutions précédentes, sans la vider.
+# Renvoie aussi les lignes lues, à passer à drop_dead_letters une fois l'exécution réussie.
+def read_dead_letters(dead_letter_path):
+    with dead_letter_lock(dead_letter_path):
+        lines = _read_dead_letter_lines(dead_letter_path)
+    urls = []
+    for line in lines:
+        try:
+            urls.append(json.loads(line)['url'])
+        except (json.JSONDecodeError, KeyError):
+            continue
+    return list(dict.fromkeys(urls)), lines
+
+
+# Retirer du fichier les lignes relues par read_dead_letters. Celles ajoutées depuis, par cette
+# exécution ou par un autre nœud, sont conservées, même si un autre nœud a déjà vidé le fichier.
+def drop_dead_letters(dead_letter_path, read_lines):
+    if not read_lines:
+        return
+    with dead_letter_lock(dead_letter_path):
+        to_drop = Counter(read_lines)
+        remaining = []
+        for line in _read_dead_letter_lines(dead_letter_path):
+            if to_drop[line]:
+                to_drop[line] -= 1
+            else:
+                remaining.append(line)
+        if not remaining:
+            if os.path.exists(dead_letter_path):
+                os.remove(dead_letter_path)
+            return
+        tmp_path = f"{dead_letter_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as file:
+            file.write(b''.join(remaining))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, dead_letter_path)
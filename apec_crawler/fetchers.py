@@ -0,0 +1,132 @@
+import threading
+from urllib.parse import urlsplit, urlunsplit
+import requests
+from requests.adapters import HTTPAdapter
+from .metrics import metrics
+
+# Sélecteur présent sur toute page de détail d'offre correctement rendue
+OFFER_READY_SELECTOR = 'ul.details-offer-list.mb-20'
+OFFER_READY_MARKER = 'details-offer-list'
+
+# Statuts HTTP pour lesquels une nouvelle tentative a un sens (None : erreur réseau ou page incomplète)
+RETRYABLE_STATUS_CODES = {None, 408, 425, 429, 500, 502, 503, 504}
+GONE_STATUS_CODES = {404, 410}
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64; rv:128.0) Gecko/20100101 Firefox/128.0',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'fr-FR,fr;q=0.9',
+}
+
+
+# Erreur levée par un backend lorsqu'une page n'a pas pu être récupérée
+class FetchError(Exception):
+    def __init__(self, url, message, status_code=None):
+        super().__init__(f"{url} : {message}")
+        self.url = url
+        self.status_code = status_code
+
+
+# Backend HTTP : session keep-alive partagée entre les threads, sans navigateur.
+# target_latency : temps de réponse au-delà duquel l'ordonnanceur ralentit (None : réglage de l'ordonnanceur)
+class HttpFetcher:
+    def __init__(self, pool_size=10, timeout=30, base_url=None, ready_marker=OFFER_READY_MARKER, headers=None, target_latency=None):
+        self.timeout = timeout
+        self.target_latency = target_latency
+        # Permet de rediriger les requêtes vers un serveur local de substitution
+        self.base_url = base_url
+        self.ready_marker = ready_marker
+        self.session = requests.Session()
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _rewrite(self, url):
+        if not self.base_url:
+            return url
+        base = urlsplit(self.base_url)
+        parts = urlsplit(url)
+        return urlunsplit((base.scheme, base.netloc, parts.path, parts.query, parts.fragment))
+
+    def fetch(self, url):
+        try:
+            response = self.session.get(self._rewrite(url), timeout=self.timeout)
+        except requests.RequestException as e:
+            raise FetchError(url, str(e))
+        if response.status_code != 200:
+            raise FetchError(url, f"statut HTTP {response.status_code}", response.status_code)
+
+        # Une page rendue côté client ne contient pas encore les données de l'offre
+        if self.ready_marker and self.ready_marker not in response.text:
+            raise FetchError(url, "page non pré-rendue")
+        return response.text
+
+    def close(self):
+        self.session.close()
+
+
+# Backend Selenium : page rendue par un navigateur emprunté au pool. Le rendu prend
+# plusieurs secondes : target_latency doit en tenir compte pour ne pas ralentir le crawl à tort.
+class SeleniumFetcher:
+    def __init__(self, driver_pool, ready_selector=OFFER_READY_SELECTOR, wait_timeout=10, target_latency=None):
+        self.driver_pool = driver_pool
+        self.target_latency = target_latency
+        self.ready_selector = ready_selector
+        self.wait_timeout = wait_timeout
+
+    def fetch(self, url):
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.common.exceptions import WebDriverException
+
+        try:
+            with self.driver_pool.lease() as driver:
+                driver.get(url)
+                if self.ready_selector:
+                    with metrics.timed('wait_for_selector'):
+                        WebDriverWait(driver, self.wait_timeout).until(EC.presence_of_element_located((By.CSS_SELECTOR, self.ready_selector)))
+                return driver.page_source
+        except WebDriverException as e:
+            raise FetchError(url, e.msg or type(e).__name__)
+
+
+# Essayer le backend rapide, puis le navigateur en cas d'échec
+class FallbackFetcher:
+    def __init__(self, primary, fallback, disable_after=50):
+        self.primary = primary
+        self.fallback = fallback
+        # Au-delà de ce nombre d'échecs consécutifs, le backend rapide n'est plus essayé
+        self.disable_after = disable_after
+        self._consecutive_failures = 0
+        # Backend ayant servi la dernière page de chaque thread
+        self._last = threading.local()
+
+    # Objectif de temps de réponse du backend qui vient de servir la page dans ce thread
+    @property
+    def target_latency(self):
+        return getattr(getattr(self._last, 'backend', self.primary), 'target_latency', None)
+
+    def fetch(self, url):
+        if not self.disable_after or self._consecutive_failures < self.disable_after:
+            try:
+                self._last.backend = self.primary
+                html_content = self.primary.fetch(url)
+                self._consecutive_failures = 0
+                return html_content
+            except FetchError as e:
+                # Une offre retirée le serait aussi dans le navigateur ; les autres refus
+                # (401, 403 de la protection anti-robots, ...) sont des échecs du backend rapide
+                if e.status_code in GONE_STATUS_CODES:
+                    self._consecutive_failures = 0
+                    raise
+                self._consecutive_failures += 1
+        self._last.backend = self.fallback
+        return self.fallback.fetch(url)
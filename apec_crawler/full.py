@@ -0,0 +1,137 @@
+import os
+from .async_crawler import AsyncCrawler
+from .checkpoint import CheckpointLog, import_legacy_progress
+from .config import EXPORT_SOURCES
+from .db_writer import iter_job_offers
+from .exports import write_offers, export_paths
+from .offer_parser import parse_offer_links
+from .parse_stage import ParsePipeline, parse_offer_page
+from .runtime import CrawlRuntime
+from .sharding import ShardQueue, default_worker_id, run_shard_worker, merge_results, result_logs
+
+
+# Journal de reprise du crawl complet, vidé si restart, sinon complété d'une sauvegarde
+# au format précédent (fichier JSON complet)
+def open_checkpoint(config, restart=False):
+    checkpoint = CheckpointLog(config.checkpoint_file, config.cursor_file)
+    if restart:
+        checkpoint.reset()
+    elif os.path.exists(config.progress_file) and not os.path.exists(config.cursor_file):
+        import_legacy_progress(config.progress_file, checkpoint)
+    return checkpoint
+
+
+# Crawl des pages [first_page, last_page] ; on_offer reçoit chaque offre,
+# on_progress le numéro de la première page non terminée.
+# Renvoie les pages de résultats illisibles : le curseur s'arrête à la première d'entre elles.
+def crawl_pages(runtime, first_page, last_page, on_offer, on_progress):
+    config = runtime.config
+    pages = [(page_number, config.search_page_url.format(page_number=page_number)) for page_number in range(first_page, last_page + 1)]
+    listing_fetcher = runtime.listing_fetcher()
+    crawler = AsyncCrawler(
+        lambda url: parse_offer_links(listing_fetcher.fetch(url), url),
+        runtime.detail_fetcher().fetch,
+        concurrency=config.concurrency,
+        # Les pages de détail sont analysées dans un pool de processus
+        parse_offer=parse_offer_page,
+        parse_workers=config.parse_workers,
+    )
+    return crawler.run(pages, on_offer, on_progress)
+
+
+# Relancer les offres et pages de résultats abandonnées lors des exécutions précédentes
+def retry_dead_letters(runtime, on_offer):
+    offer_links = runtime.dead_letter_links()
+    if not offer_links:
+        return
+    print(f"{len(offer_links)} offres abandonnées lors des exécutions précédentes à relancer.")
+    pipeline = ParsePipeline(runtime.detail_fetcher(), fetch_workers=runtime.config.concurrency, parse_workers=runtime.config.parse_workers)
+    for job_data in pipeline.run(offer_links):
+        on_offer(job_data)
+
+
+# Crawl sur un seul processus, repris à la page du curseur ; la progression est sauvegardée
+# dès qu'une suite de pages est terminée. Les max_pages pages sont numérotées de 0 à max_pages - 1.
+def crawl_all_pages(runtime, checkpoint):
+    current_page = checkpoint.load_cursor()
+    last_page = runtime.config.max_pages - 1
+    print(f"Crawl des pages {current_page} à {last_page}.")
+    failed_pages = crawl_pages(runtime, current_page, last_page, checkpoint.append, checkpoint.save_cursor)
+    checkpoint.sync()
+    if failed_pages:
+        print(f"{len(failed_pages)} pages de résultats n'ont pas pu être lues ({', '.join(map(str, failed_pages))}) : "
+              f"le crawl reprendra à la page {checkpoint.load_cursor()} avec 'resume'.")
+    return failed_pages
+
+
+# Mode réparti : ce nœud traite les plages de pages qu'il réserve dans la file partagée
+# et écrit ses offres dans son propre journal. Renvoie True pour le seul nœud chargé
+# de la fusion, une fois toutes les plages terminées.
+def crawl_shards(runtime):
+    config = runtime.config
+    os.makedirs(config.shard_results_dir, exist_ok=True)
+    worker_id = default_worker_id()
+    worker_log = CheckpointLog(os.path.join(config.shard_results_dir, f"{worker_id}.jsonl"),
+                               os.path.join(config.shard_results_dir, f"{worker_id}.cursor.json"))
+
+    with ShardQueue(config.shard_queue_file) as shard_queue:
+        shard_queue.create_ranges(0, config.max_pages - 1, config.shard_range_size)
+
+        def crawl_range(first_page, last_page, on_progress):
+            # Les offres sont écrites sur disque avant que la progression ne soit déclarée
+            def save_and_report(next_page):
+                worker_log.sync()
+                on_progress(next_page)
+            # Une plage dont des pages n'ont pas pu être lues n'est pas terminée
+            return not crawl_pages(runtime, first_page, last_page, worker_log.append, save_and_report)
+
+        retry_dead_letters(runtime, worker_log.append)
+        worker_log.sync()
+        runtime.drop_retried_dead_letters()
+        ranges_done = run_shard_worker(shard_queue, crawl_range, worker_id)
+        print(f"[{worker_id}] {ranges_done} plages traitées, état de la file : {shard_queue.status()}")
+        status = shard_queue.status()
+        if status['failed']:
+            print(f"{status['failed']} plages n'ont pas pu être terminées après {shard_queue.max_attempts} tentatives.")
+        merging = shard_queue.claim_merge(worker_id)
+
+    worker_log.close()
+    return merging
+
+
+# Exports fichier alimentés en flux : la mémoire utilisée ne dépend pas du nombre d'offres
+def save_exports(job_data_stream, config):
+    pipeline = write_offers(job_data_stream, config)
+    print(f"Traitement terminé. Les données de {pipeline.count} offres ont été sauvegardées dans {', '.join(export_paths(pipeline)) or config.db_path}.")
+    return pipeline
+
+
+# Crawl complet de toutes les pages de résultats, puis exports.
+# restart : repartir de la première page au lieu de reprendre à la page du curseur.
+def run_full(config, restart=False):
+    with CrawlRuntime(config) as runtime:
+        if config.shard_queue_file:
+            # Un seul nœud fusionne les journaux de tous les nœuds
+            if crawl_shards(runtime):
+                return save_exports(merge_results(result_logs(config.shard_results_dir)), config)
+            print("Les journaux sont fusionnés par un autre nœud.")
+            return None
+
+        with open_checkpoint(config, restart) as checkpoint:
+            retry_dead_letters(runtime, checkpoint.append)
+            checkpoint.sync()
+            runtime.drop_retried_dead_letters()
+            crawl_all_pages(runtime, checkpoint)
+            return save_exports(checkpoint.iter_records(), config)
+
+
+# Exports seuls, sans crawl, depuis le journal de reprise, les journaux des nœuds ou la base
+def run_export(config, source='checkpoint'):
+    if source == 'checkpoint':
+        with CheckpointLog(config.checkpoint_file, config.cursor_file) as checkpoint:
+            return save_exports(checkpoint.iter_records(), config)
+    if source == 'shards':
+        return save_exports(merge_results(result_logs(config.shard_results_dir)), config)
+    if source == 'db':
+        return save_exports(iter_job_offers(config.db_path), config)
+    raise ValueError(f"Source d'export inconnue : {source} (parmi {', '.join(EXPORT_SOURCES)})")
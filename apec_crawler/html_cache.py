@@ -0,0 +1,187 @@
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from .fetchers import FetchError
+from .offer_index import ref_from_url
+from .parse_stage import ParsePipeline
+from .metrics import metrics
+
+
+# Cache disque des pages HTML récupérées. Le contenu est stocké compressé sous son
+# empreinte SHA-256 (deux URL au contenu identique partagent le même fichier) et un
+# index SQLite associe chaque URL / référence Apec à son contenu et à sa date.
+class HtmlCache:
+    def __init__(self, cache_dir, ttl=None, max_bytes=None, evict_every=500):
+        self.cache_dir = cache_dir
+        # Durée de validité d'une page (secondes) et taille maximale du cache (octets)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.evict_every = evict_every
+        self._puts_since_evict = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.join(cache_dir, 'objects'), exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(cache_dir, 'index.db'), check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS pages
+                     (url TEXT PRIMARY KEY, ref_apec TEXT, kind TEXT, content_hash TEXT, size INTEGER, fetched_at REAL)''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_pages_ref_apec ON pages (ref_apec)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_pages_fetched_at ON pages (fetched_at)')
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _object_path(self, content_hash):
+        return os.path.join(self.cache_dir, 'objects', content_hash[:2], content_hash + '.html.gz')
+
+    @property
+    def has_limits(self):
+        return self.ttl is not None or self.max_bytes is not None
+
+    @staticmethod
+    def _write_object(path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, 'wb', compresslevel=6) as file:
+            file.write(data)
+        os.replace(tmp_path, path)
+
+    def put(self, url, html_content, kind='offre'):
+        data = html_content.encode('utf-8')
+        content_hash = hashlib.sha256(data).hexdigest()
+        path = self._object_path(content_hash)
+        if not os.path.exists(path):
+            self._write_object(path, data)
+
+        with self._lock:
+            # Le fichier a pu être supprimé par une éviction entre son écriture et son indexation
+            if not os.path.exists(path):
+                self._write_object(path, data)
+            with self.conn:
+                self.conn.execute('INSERT OR REPLACE INTO pages (url, ref_apec, kind, content_hash, size, fetched_at) VALUES (?, ?, ?, ?, ?, ?)',
+                                  (url, ref_from_url(url), kind, content_hash, os.path.getsize(path), time.time()))
+            self._puts_since_evict += 1
+            should_evict = self.has_limits and self._puts_since_evict >= self.evict_every
+        if should_evict:
+            self.evict()
+
+    def _read(self, content_hash):
+        try:
+            with gzip.open(self._object_path(content_hash), 'rb') as file:
+                return file.read().decode('utf-8')
+        except FileNotFoundError:
+            return None
+
+    def _is_fresh(self, fetched_at):
+        return self.ttl is None or time.time() - fetched_at <= self.ttl
+
+    # Page en cache pour une URL, ou None si absente (ou expirée, si fresh_only)
+    def get(self, url, fresh_only=True):
+        with self._lock:
+            row = self.conn.execute('SELECT content_hash, fetched_at FROM pages WHERE url = ?', (url,)).fetchone()
+        if row is None or (fresh_only and not self._is_fresh(row[1])):
+            return None
+        return self._read(row[0])
+
+    # Page la plus récente pour une référence Apec
+    def get_by_ref(self, ref_apec):
+        with self._lock:
+            row = self.conn.execute('SELECT content_hash, fetched_at FROM pages WHERE ref_apec = ? ORDER BY fetched_at DESC LIMIT 1', (ref_apec,)).fetchone()
+        if row is None or not self._is_fresh(row[1]):
+            return None
+        return self._read(row[0])
+
+    # URL en cache pour un type de page ('offre' ou 'liste'), sans les charger en mémoire
+    def urls(self, kind='offre'):
+        with self._lock:
+            rows = self.conn.execute('SELECT url FROM pages WHERE kind = ? ORDER BY fetched_at', (kind,)).fetchall()
+        for (url,) in rows:
+            yield url
+
+    # Supprimer les pages expirées, puis les plus anciennes tant que la taille maximale est dépassée.
+    # Seuls les fichiers des contenus retirés de l'index lors de ce passage sont supprimés, sous le
+    # verrou : un put concurrent ne peut pas indexer un contenu dont le fichier disparaît ensuite.
+    def evict(self):
+        if not self.has_limits:
+            return
+        with self._lock:
+            self._puts_since_evict = 0
+            candidates = set()
+            with self.conn:
+                if self.ttl is not None:
+                    expires_before = time.time() - self.ttl
+                    candidates.update(content_hash for (content_hash,) in self.conn.execute(
+                        'SELECT DISTINCT content_hash FROM pages WHERE fetched_at < ?', (expires_before,)))
+                    self.conn.execute('DELETE FROM pages WHERE fetched_at < ?', (expires_before,))
+                if self.max_bytes is not None:
+                    total = 0
+                    cutoff = None
+                    # La taille d'un contenu partagé n'est comptée qu'une fois
+                    for content_hash, size, fetched_at in self.conn.execute(
+                            'SELECT content_hash, MAX(size), MAX(fetched_at) AS last_fetch FROM pages GROUP BY content_hash ORDER BY last_fetch DESC'):
+                        total += size
+                        if total > self.max_bytes:
+                            cutoff = fetched_at
+                            break
+                    if cutoff is not None:
+                        oldest = [content_hash for (content_hash,) in self.conn.execute(
+                            'SELECT content_hash FROM pages GROUP BY content_hash HAVING MAX(fetched_at) <= ?', (cutoff,))]
+                        candidates.update(oldest)
+                        self.conn.executemany('DELETE FROM pages WHERE content_hash = ?', ((content_hash,) for content_hash in oldest))
+
+            # Un contenu encore indexé sous une autre URL est conservé
+            for content_hash in candidates:
+                if self.conn.execute('SELECT 1 FROM pages WHERE content_hash = ? LIMIT 1', (content_hash,)).fetchone() is None:
+                    try:
+                        os.remove(self._object_path(content_hash))
+                    except FileNotFoundError:
+                        pass
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+# Backend qui enregistre chaque page récupérée dans le cache, et la relit si elle y est encore valide
+class CachingFetcher:
+    def __init__(self, fetcher, cache, kind='offre', use_cached=True):
+        self.fetcher = fetcher
+        self.cache = cache
+        self.kind = kind
+        self.use_cached = use_cached
+
+    def fetch(self, url):
+        if self.use_cached:
+            html_content = self.cache.get(url)
+            if html_content is not None:
+                metrics.inc('cache_hits_total', kind=self.kind)
+                return html_content
+        html_content = self.fetcher.fetch(url)
+        self.cache.put(url, html_content, self.kind)
+        return html_content
+
+
+# Backend de relecture : uniquement le cache, aucun accès réseau, pages expirées comprises
+class CacheReader:
+    def __init__(self, cache):
+        self.cache = cache
+
+    def fetch(self, url):
+        html_content = self.cache.get(url, fresh_only=False)
+        if html_content is None:
+            raise FetchError(url, "page absente du cache")
+        return html_content
+
+
+# Ré-analyser toutes les pages d'offres du cache, sans réseau
+def replay_offers(cache, parse_workers=None):
+    pipeline = ParsePipeline(CacheReader(cache), fetch_workers=4, parse_workers=parse_workers)
+    return pipeline.run(cache.urls('offre'))
@@ -0,0 +1,194 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Bornes des histogrammes de durée (secondes)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        index = 0
+        while index < len(self.buckets) and value > self.buckets[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    # Quantile estimé par interpolation linéaire dans le bucket concerné
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(label_key, extra=()):
+    items = list(label_key) + list(extra)
+    if not items:
+        return ''
+    return '{' + ','.join(f'{name}="{value}"' for name, value in items) + '}'
+
+
+# Registre des mesures d'un crawl : compteurs, jauges et histogrammes de durée par étape
+class Metrics:
+    def __init__(self):
+        self.started_at = time.time()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        with self._lock:
+            self._gauges[(name, _label_key(labels))] = value
+
+    def observe(self, stage, duration):
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram()
+            histogram.observe(duration)
+
+    # Mesurer la durée d'une étape et compter ses erreurs par type
+    @contextmanager
+    def timed(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.inc('errors_total', stage=stage, type=type(e).__name__)
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    # Enregistrer le résultat d'un appel mesuré dans un autre processus (voir timed_call)
+    def record_call(self, stage, elapsed, error_type=None):
+        self.observe(stage, elapsed)
+        if error_type:
+            self.inc('errors_total', stage=stage, type=error_type)
+
+    # Exposition au format texte de Prometheus
+    def prometheus_text(self):
+        lines = []
+        with self._lock:
+            for (name, label_key), value in sorted(self._counters.items()):
+                lines.append(f"apec_{name}{_format_labels(label_key)} {value}")
+            for (name, label_key), value in sorted(self._gauges.items()):
+                lines.append(f"apec_{name}{_format_labels(label_key)} {value}")
+            for stage, histogram in sorted(self._histograms.items()):
+                stage_label = (('stage', stage),)
+                cumulative = 0
+                for bound, bucket_count in zip(histogram.buckets, histogram.counts):
+                    cumulative += bucket_count
+                    lines.append(f"apec_stage_duration_seconds_bucket{_format_labels(stage_label, [('le', bound)])} {cumulative}")
+                lines.append(f"apec_stage_duration_seconds_bucket{_format_labels(stage_label, [('le', '+Inf')])} {histogram.count}")
+                lines.append(f"apec_stage_duration_seconds_sum{_format_labels(stage_label)} {histogram.sum}")
+                lines.append(f"apec_stage_duration_seconds_count{_format_labels(stage_label)} {histogram.count}")
+        return '\n'.join(lines) + '\n'
+
+    # Résumé de fin d'exécution : débit, p50/p99 par étape, erreurs et jauges
+    def summary(self):
+        elapsed = time.time() - self.started_at
+        with self._lock:
+            stages = {
+                stage: {
+                    'count': histogram.count,
+                    'total_seconds': round(histogram.sum, 3),
+                    'mean_seconds': round(histogram.sum / histogram.count, 4) if histogram.count else None,
+                    'p50_seconds': histogram.quantile(0.5),
+                    'p99_seconds': histogram.quantile(0.99),
+                    'per_second': round(histogram.count / elapsed, 3) if elapsed else None,
+                }
+                for stage, histogram in self._histograms.items()
+            }
+            counters = {name + _format_labels(label_key): value for (name, label_key), value in self._counters.items()}
+            gauges = {name + _format_labels(label_key): value for (name, label_key), value in self._gauges.items()}
+        return {'elapsed_seconds': round(elapsed, 3), 'stages': stages, 'counters': counters, 'gauges': gauges}
+
+    def write_summary(self, path):
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.summary(), file, ensure_ascii=False, indent=2)
+
+    # Serveur local : /metrics (Prometheus) et /summary (JSON)
+    def serve(self, port=9108, host='127.0.0.1'):
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith('/metrics'):
+                    body, content_type = registry.prometheus_text(), 'text/plain; version=0.0.4'
+                elif self.path.startswith('/summary'):
+                    body, content_type = json.dumps(registry.summary(), ensure_ascii=False), 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        print(f"Mesures disponibles sur http://{host}:{port}/metrics")
+        return self._server
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server = None
+
+
+# Registre partagé par tous les modules du crawler
+metrics = Metrics()
+
+
+# Appel mesuré exécutable dans un processus de travail : renvoie (résultat, durée, type d'erreur)
+def timed_call(function, *args):
+    start = time.perf_counter()
+    try:
+        return function(*args), time.perf_counter() - start, None
+    except Exception as e:
+        return None, time.perf_counter() - start, type(e).__name__
+
+
+# Backend dont chaque récupération est mesurée sous le nom d'étape donné
+class TimedFetcher:
+    def __init__(self, fetcher, stage, registry=metrics):
+        self.fetcher = fetcher
+        self.stage = stage
+        self.registry = registry
+
+    def fetch(self, url):
+        with self.registry.timed(self.stage):
+            return self.fetcher.fetch(url)
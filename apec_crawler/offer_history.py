@@ -0,0 +1,170 @@
+import hashlib
+import sqlite3
+import zlib
+from datetime import datetime, date
+from .offer_index import content_hash
+from .offer_record import OFFER_FIELDS
+
+# Champs conservés dans chaque version ; la description est stockée à part, une seule fois par texte
+VERSION_FIELDS = [field for field in OFFER_FIELDS if field not in ('reference_apec', 'description')] + ['url']
+
+
+def create_history_tables(conn):
+    columns = ', '.join(f'{field} TEXT' for field in VERSION_FIELDS)
+    conn.execute(f'''CREATE TABLE IF NOT EXISTS offer_versions
+                     (ref_apec TEXT, version INTEGER, valid_from TEXT, valid_to TEXT, last_seen TEXT, version_hash TEXT, description_hash TEXT, {columns},
+                      PRIMARY KEY (ref_apec, version))''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_offer_versions_valid_from ON offer_versions (valid_from)')
+    conn.execute('''CREATE TABLE IF NOT EXISTS offer_descriptions
+                    (description_hash TEXT PRIMARY KEY, description BLOB)''')
+    conn.commit()
+
+
+def description_hash(description):
+    return hashlib.sha1(description.encode('utf-8')).hexdigest()
+
+
+# Horodatage comparable en texte ; une date seule désigne la fin de cette journée
+def as_timestamp(when):
+    if isinstance(when, datetime):
+        return when.isoformat(timespec='seconds')
+    if isinstance(when, date):
+        return f"{when.isoformat()}T23:59:59"
+    if len(when) == 10:
+        return f"{when}T23:59:59"
+    return when
+
+
+# Historique des offres : une nouvelle version n'est écrite que lorsque l'empreinte des champs
+# normalisés change ; une offre revue à l'identique ne met à jour que sa date de dernière visite.
+# Les descriptions, souvent identiques d'une version à l'autre, sont compressées et dédoublonnées.
+class OfferHistory:
+    def __init__(self, db_path, batch_size=500, compression_level=6):
+        self.batch_size = batch_size
+        self.compression_level = compression_level
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        create_history_tables(self.conn)
+        self._batch = []
+        self.stats = {'new': 0, 'changed': 0, 'unchanged': 0, 'removed': 0, 'reappeared': 0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    # Enregistrer une offre vue à seen_at (maintenant par défaut)
+    def add(self, job_data, seen_at=None):
+        if not job_data.get('reference_apec'):
+            return
+        self._batch.append((job_data, as_timestamp(seen_at or datetime.now())))
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, []
+        refs = list({job_data.get('reference_apec') for job_data, _ in batch})
+        with self.conn:
+            # Dernière version de chaque offre, en cours ou close (offre retirée puis revenue)
+            latest = {}
+            placeholders = ', '.join('?' for _ in refs)
+            for ref_apec, version, version_hash, valid_to in self.conn.execute(
+                    f'''SELECT ref_apec, version, version_hash, valid_to FROM offer_versions v
+                        WHERE ref_apec IN ({placeholders}) AND version = (SELECT MAX(version) FROM offer_versions WHERE ref_apec = v.ref_apec)''', refs):
+                latest[ref_apec] = (version, version_hash, valid_to is None)
+
+            for job_data, seen_at in batch:
+                ref_apec = job_data.get('reference_apec')
+                version_hash = content_hash(job_data)
+                version, current_hash, is_open = latest.get(ref_apec, (0, None, False))
+                if is_open and version_hash == current_hash:
+                    self.conn.execute('UPDATE offer_versions SET last_seen = ? WHERE ref_apec = ? AND version = ?', (seen_at, ref_apec, version))
+                    self.stats['unchanged'] += 1
+                    continue
+
+                if is_open:
+                    self.stats['changed'] += 1
+                    self.conn.execute('UPDATE offer_versions SET valid_to = ? WHERE ref_apec = ? AND version = ?', (seen_at, ref_apec, version))
+                else:
+                    self.stats['reappeared' if version else 'new'] += 1
+                self.conn.execute(self._insert_sql(), self._version_row(job_data, ref_apec, version + 1, seen_at, version_hash))
+                latest[ref_apec] = (version + 1, version_hash, True)
+
+    # Offres vues dans les résultats de recherche à seen_at sans que leur page de détail ait été
+    # enregistrée depuis : leur version en cours est prolongée (dernière visite mise à jour).
+    # Une offre close puis revue reçoit une nouvelle version, copie de la dernière.
+    def record_sightings(self, refs, seen_at):
+        self.flush()
+        refs = list(refs)
+        timestamp = as_timestamp(seen_at)
+        columns = ', '.join(['version_hash', 'description_hash'] + VERSION_FIELDS)
+        with self.conn:
+            cursor = self.conn.executemany(
+                f'''INSERT INTO offer_versions (ref_apec, version, valid_from, last_seen, {columns})
+                    SELECT ref_apec, version + 1, ?, ?, {columns} FROM offer_versions v
+                    WHERE ref_apec = ? AND valid_to IS NOT NULL AND version = (SELECT MAX(version) FROM offer_versions WHERE ref_apec = v.ref_apec)''',
+                ((timestamp, timestamp, ref_apec) for ref_apec in refs))
+            self.stats['reappeared'] += cursor.rowcount
+            cursor = self.conn.executemany('UPDATE offer_versions SET last_seen = ? WHERE ref_apec = ? AND valid_to IS NULL AND last_seen < ?',
+                                           ((timestamp, ref_apec, timestamp) for ref_apec in refs))
+            self.stats['unchanged'] += cursor.rowcount
+
+    # Clore les offres absentes d'un parcours complet des résultats commencé à listed_at
+    def close_unseen(self, listed_at):
+        self.flush()
+        timestamp = as_timestamp(listed_at)
+        with self.conn:
+            cursor = self.conn.execute('UPDATE offer_versions SET valid_to = ? WHERE valid_to IS NULL AND last_seen < ?', (timestamp, timestamp))
+        self.stats['removed'] += cursor.rowcount
+
+    @staticmethod
+    def _insert_sql():
+        columns = ', '.join(['ref_apec', 'version', 'valid_from', 'last_seen', 'version_hash', 'description_hash'] + VERSION_FIELDS)
+        placeholders = ', '.join('?' for _ in range(6 + len(VERSION_FIELDS)))
+        return f'INSERT INTO offer_versions ({columns}) VALUES ({placeholders})'
+
+    def _version_row(self, job_data, ref_apec, version, seen_at, version_hash):
+        description = job_data.get('description')
+        stored_hash = None
+        if description is not None:
+            stored_hash = description_hash(description)
+            self.conn.execute('INSERT OR IGNORE INTO offer_descriptions (description_hash, description) VALUES (?, ?)',
+                              (stored_hash, zlib.compress(description.encode('utf-8'), self.compression_level)))
+        return (ref_apec, version, seen_at, seen_at, version_hash, stored_hash) + tuple(job_data.get(field) for field in VERSION_FIELDS)
+
+    def _select(self, where, parameters):
+        columns = ', '.join(f'v.{field}' for field in ['ref_apec', 'version', 'valid_from', 'valid_to', 'last_seen'] + VERSION_FIELDS)
+        sql = f'''SELECT {columns}, d.description FROM offer_versions v
+                  LEFT JOIN offer_descriptions d ON d.description_hash = v.description_hash WHERE {where}'''
+        names = ['reference_apec', 'version', 'valid_from', 'valid_to', 'last_seen'] + VERSION_FIELDS + ['description']
+        for row in self.conn.execute(sql, parameters):
+            offer = dict(zip(names, row))
+            if offer['description'] is not None:
+                offer['description'] = zlib.decompress(offer['description']).decode('utf-8')
+            yield offer
+
+    # Offre telle qu'elle était à la date donnée (None si elle n'existait pas encore)
+    def as_of(self, ref_apec, when):
+        self.flush()
+        timestamp = as_timestamp(when)
+        return next(self._select('v.ref_apec = ? AND v.valid_from <= ? AND (v.valid_to IS NULL OR v.valid_to > ?)',
+                                 (ref_apec, timestamp, timestamp)), None)
+
+    # Toutes les offres connues à la date donnée, dans leur version de ce jour-là
+    def snapshot(self, when):
+        self.flush()
+        timestamp = as_timestamp(when)
+        return self._select('v.valid_from <= ? AND (v.valid_to IS NULL OR v.valid_to > ?)', (timestamp, timestamp))
+
+    def versions(self, ref_apec):
+        self.flush()
+        return list(self._select('v.ref_apec = ? ORDER BY v.version', (ref_apec,)))
+
+    def close(self):
+        if self.conn is not None:
+            self.flush()
+            self.conn.close()
+            self.conn = None
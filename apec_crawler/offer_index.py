@@ -0,0 +1,88 @@
+import hashlib
+import json
+import re
+import sqlite3
+
+# Les URL de détail se terminent par le numéro de l'offre : .../detail-offre/175123456W?...
+OFFER_REF_PATTERN = re.compile(r'/detail-offre/([^/?#]+)')
+
+# Champs exclus de l'empreinte : ils ne décrivent pas le contenu de l'offre
+HASH_EXCLUDED_FIELDS = ('url', 'content_hash')
+
+
+# Extraire la référence Apec d'une URL d'offre
+def ref_from_url(offer_link):
+    match = OFFER_REF_PATTERN.search(offer_link or '')
+    return match.group(1) if match else None
+
+
+# Empreinte du contenu d'une offre, indépendante de l'ordre des champs
+def content_hash(job_data):
+    payload = {key: value for key, value in job_data.items() if key not in HASH_EXCLUDED_FIELDS}
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')).hexdigest()
+
+
+# Ajouter les colonnes et index utilisés par le crawl incrémental à une base existante
+def ensure_index_schema(conn):
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(job_offers)')}
+    if 'content_hash' not in columns:
+        conn.execute('ALTER TABLE job_offers ADD COLUMN content_hash TEXT')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_job_offers_url ON job_offers (url)')
+    conn.commit()
+
+
+# Petites valeurs conservées d'une exécution à l'autre (repère du crawl incrémental, ...)
+def ensure_state_schema(conn):
+    conn.execute('CREATE TABLE IF NOT EXISTS crawl_state (name TEXT PRIMARY KEY, value TEXT, updated_at TEXT)')
+    conn.commit()
+
+
+def load_state(db_path, name, default=None):
+    with sqlite3.connect(db_path) as conn:
+        ensure_state_schema(conn)
+        row = conn.execute('SELECT value FROM crawl_state WHERE name = ?', (name,)).fetchone()
+    return json.loads(row[0]) if row else default
+
+
+def save_state(db_path, name, value):
+    with sqlite3.connect(db_path) as conn:
+        ensure_state_schema(conn)
+        conn.execute("INSERT OR REPLACE INTO crawl_state (name, value, updated_at) VALUES (?, ?, datetime('now'))",
+                     (name, json.dumps(value, ensure_ascii=False)))
+
+
+# Index en mémoire des offres déjà présentes dans job_offers.db
+class OfferIndex:
+    def __init__(self, hashes_by_ref=None, urls=None):
+        self.hashes_by_ref = hashes_by_ref or {}
+        self.urls = urls or set()
+
+    @classmethod
+    def load(cls, db_path):
+        hashes_by_ref = {}
+        urls = set()
+        with sqlite3.connect(db_path) as conn:
+            ensure_index_schema(conn)
+            for ref_apec, url, stored_hash in conn.execute('SELECT ref_apec, url, content_hash FROM job_offers'):
+                hashes_by_ref[ref_apec] = stored_hash
+                if url and url != '.':
+                    urls.add(url)
+        return cls(hashes_by_ref, urls)
+
+    def __len__(self):
+        return len(self.hashes_by_ref)
+
+    def is_known(self, offer_link):
+        return offer_link in self.urls or ref_from_url(offer_link) in self.hashes_by_ref
+
+    # Séparer les liens inconnus des liens déjà enregistrés
+    def split(self, offer_links):
+        new_links, known_links = [], []
+        for offer_link in offer_links:
+            (known_links if self.is_known(offer_link) else new_links).append(offer_link)
+        return new_links, known_links
+
+    # Une offre déjà connue n'a changé que si son empreinte diffère de celle enregistrée
+    def has_changed(self, job_data):
+        stored_hash = self.hashes_by_ref.get(job_data.get('reference_apec'))
+        return stored_hash is None or stored_hash != job_data.get('content_hash')
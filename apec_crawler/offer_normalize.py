@@ -0,0 +1,104 @@
+import pandas as pd
+from .offer_record import OfferRecord, NUMERIC_FIELDS
+
+# Champs bruts nécessaires au calcul des champs dérivés
+SOURCE_FIELDS = ['location', 'salary_raw', 'date_publication', 'experience']
+DERIVED_FIELDS = ['ville', 'departement', 'salary_average', 'salary_minimum', 'mois_publication', 'experience_value']
+
+# "Paris 08 - 75" : ville et numéro de département
+LOCATION_PATTERN = r'^(?P<ville>.*) - (?P<departement>\d{2})$'
+# "Publiée le 12/03/2024" est enregistré sous la forme 12/03/2024
+MONTH_PATTERN = r'^\d+/(\d+)/'
+FIRST_NUMBER_PATTERN = r'(\d+)'
+
+
+def _integers(strings):
+    return pd.to_numeric(strings, errors='coerce').astype('Int64')
+
+
+# Salaire moyen (fourchette "45 - 55 k€ brut annuel") ou minimum ("A partir de 40 k€",
+# "40 k€ brut annuel") ; "À négocier" et les libellés non reconnus restent vides
+def salary_columns(salary_raw):
+    salary_raw = salary_raw.astype('string')
+    is_range = salary_raw.str.count(' - ') == 1
+    bounds = salary_raw.where(is_range).str.split(' - ', n=1, expand=True).reindex(columns=[0, 1]).astype('string')
+    # Comme sur le site, seuls les chiffres de chaque borne sont gardés ("55 k€" -> 55)
+    low = _integers(bounds[0].str.replace(r'\D', '', regex=True).replace('', pd.NA))
+    high = _integers(bounds[1].str.replace(r'\D', '', regex=True).replace('', pd.NA))
+    salary_average = ((low + high) / 2).astype('Float64')
+
+    is_minimum = ~salary_raw.str.contains(' - ', regex=False).fillna(False) & (
+        salary_raw.str.contains('A partir de', regex=False) | salary_raw.str.contains(' k€ brut annuel', regex=False)).fillna(False)
+    salary_minimum = _integers(salary_raw.where(is_minimum).str.extract(FIRST_NUMBER_PATTERN, expand=False))
+    return salary_average, salary_minimum
+
+
+def location_columns(location):
+    parts = location.astype('string').str.extract(LOCATION_PATTERN)
+    return parts['ville'], _integers(parts['departement'])
+
+
+def month_column(date_publication):
+    return _integers(date_publication.astype('string').str.extract(MONTH_PATTERN, expand=False))
+
+
+def experience_column(experience):
+    return _integers(experience.astype('string').str.extract(FIRST_NUMBER_PATTERN, expand=False))
+
+
+# Les libellés se répètent beaucoup (mêmes salaires, villes, dates) : le calcul est fait
+# une fois par valeur distincte, puis reporté sur toutes les lignes
+def _on_unique(column, function):
+    codes, uniques = pd.factorize(column)
+    results = function(pd.Series(uniques, dtype=object))
+    if not isinstance(results, tuple):
+        return _take(results, codes, column.index)
+    return tuple(_take(result, codes, column.index) for result in results)
+
+
+def _take(result, codes, index):
+    # Code -1 : valeur absente dans la colonne d'origine
+    taken = result.reindex(codes)
+    taken.index = index
+    return taken
+
+
+# Calcul vectorisé des champs dérivés sur un DataFrame contenant au moins SOURCE_FIELDS
+def normalize_frame(frame):
+    frame = frame.copy()
+    frame['ville'], frame['departement'] = _on_unique(frame['location'], location_columns)
+    frame['salary_average'], frame['salary_minimum'] = _on_unique(frame['salary_raw'], salary_columns)
+    frame['mois_publication'] = _on_unique(frame['date_publication'], month_column)
+    frame['experience_value'] = _on_unique(frame['experience'], experience_column)
+    return frame
+
+
+# Colonne pandas vers liste de valeurs Python, None pour les valeurs absentes
+def _python_values(column, field):
+    values = column.astype(object).where(column.notna(), None).tolist()
+    cast = NUMERIC_FIELDS.get(field)
+    if cast is None:
+        return values
+    return [None if value is None else cast(value) for value in values]
+
+
+# Compléter les champs dérivés d'un flux d'offres (OfferRecord ou dictionnaires) par paquets :
+# la normalisation reste vectorisée sans charger tout le flux en mémoire
+def normalize_records(records, chunk_size=5000):
+    chunk = []
+    for record in records:
+        chunk.append(record if isinstance(record, OfferRecord) else OfferRecord.from_dict(record))
+        if len(chunk) >= chunk_size:
+            yield from _normalize_chunk(chunk)
+            chunk = []
+    if chunk:
+        yield from _normalize_chunk(chunk)
+
+
+def _normalize_chunk(chunk):
+    frame = pd.DataFrame({field: [getattr(record, field) for record in chunk] for field in SOURCE_FIELDS}, dtype=object)
+    frame = normalize_frame(frame)
+    for field in DERIVED_FIELDS:
+        for record, value in zip(chunk, _python_values(frame[field], field)):
+            setattr(record, field, value)
+    return chunk
@@ -0,0 +1,165 @@
+import re
+from urllib.parse import urljoin
+import lxml.html
+from .offer_record import OfferRecord
+
+# Valeur utilisée pour un champ absent de la page
+MISSING = None
+# Morceau vide dans une valeur composée de plusieurs éléments (langues, description)
+EMPTY_PART = '.'
+
+# Intitulés h4 dont la valeur est le <span> suivant, et champ correspondant
+HEADING_FIELDS = {
+    'Expérience': 'experience',
+    'Zone de déplacement': 'travel_zone',
+    'Statut du poste': 'statut_poste',
+    'Métier': 'metier',
+    'Secteur d’activité du poste': 'secteur_activite',
+    'Télétravail': 'teletravail',
+}
+
+LISTING_LINKS_XPATH = "//div[contains(concat(' ', normalize-space(@class), ' '), ' container-result ')]//a[@queryparamshandling='merge']/@href"
+
+
+# Équivalent de get_text(strip=True) de BeautifulSoup
+def element_text(element):
+    if not isinstance(element.tag, str):
+        return ''
+    return ''.join(text.strip() for text in element.itertext())
+
+
+def has_classes(element, *classes):
+    element_classes = (element.get('class') or '').split()
+    return all(css_class in element_classes for css_class in classes)
+
+
+def next_sibling_tag(element, tag):
+    sibling = element.getnext()
+    while sibling is not None and sibling.tag != tag:
+        sibling = sibling.getnext()
+    return sibling
+
+
+def find_ancestor(element, tag, css_class):
+    parent = element.getparent()
+    while parent is not None and not (parent.tag == tag and has_classes(parent, css_class)):
+        parent = parent.getparent()
+    return parent
+
+
+def parse_languages(langues_heading):
+    parent_div = find_ancestor(langues_heading, 'div', 'flex-collapse')
+    if parent_div is None:
+        return MISSING
+    langues_list = []
+    for structure in parent_div.iter('div'):
+        if not has_classes(structure, 'added-skills-language'):
+            continue
+        for element in structure.iter('div'):
+            if not has_classes(element, 'infos_skills'):
+                continue
+            langue_tag = next(element.iter('p'), None)
+            niveau_tag = next_sibling_tag(element, 'apec-competence-tooltip-niveau')
+            if langue_tag is not None and niveau_tag is not None:
+                niveau_heading = next(niveau_tag.iter('h4'), None)
+                if niveau_heading is not None:
+                    langues_list.append(f"{element_text(langue_tag) or EMPTY_PART} ({element_text(niveau_heading) or EMPTY_PART})")
+    return ', '.join(langues_list) if langues_list else MISSING
+
+
+# Paragraphes qui suivent "Descriptif du poste", jusqu'au prochain intitulé ou "Profil recherché"
+def parse_description(description_heading):
+    description_parts = []
+    next_element = description_heading.getnext()
+    while next_element is not None and next_element.tag != 'h4' and element_text(next_element) != 'Profil recherché':
+        # Les commentaires HTML sont des frères de l'intitulé mais n'ont pas de contenu
+        if isinstance(next_element.tag, str):
+            description_parts.append(element_text(next_element) or EMPTY_PART)
+        next_element = next_element.getnext()
+    return ' '.join(description_parts) if description_parts else MISSING
+
+
+# Analyse d'une page de détail d'offre en un seul parcours de l'arbre :
+# les éléments utiles sont repérés une fois, puis chaque champ est lu dans cette table.
+# Seuls les champs bruts sont lus ici ; salaire, expérience, département et mois sont
+# calculés ensuite par paquets d'offres (offer_normalize).
+def parse_offer(html_content):
+    root = lxml.html.fromstring(html_content)
+    job_data = OfferRecord()
+
+    details_list = None
+    ref_offre_div = None
+    date_offre_div = None
+    salary_heading = None
+    langues_heading = None
+    headings = {}
+    for element in root.iter('ul', 'div', 'h4', 'h5'):
+        tag = element.tag
+        if tag == 'h4':
+            heading = element_text(element)
+            if heading not in headings:
+                headings[heading] = element
+            if heading == 'Salaire' and salary_heading is None and find_ancestor(element, 'div', 'details-post') is not None:
+                salary_heading = element
+        elif tag == 'div':
+            if ref_offre_div is None and has_classes(element, 'ref-offre'):
+                ref_offre_div = element
+            elif date_offre_div is None and has_classes(element, 'date-offre', 'mb-10'):
+                date_offre_div = element
+        elif tag == 'ul':
+            if details_list is None and has_classes(element, 'details-offer-list', 'mb-20'):
+                details_list = element
+        elif tag == 'h5' and langues_heading is None and element_text(element) == 'Langues':
+            langues_heading = element
+
+    if details_list is not None:
+        list_items = list(details_list.iter('li'))
+        if len(list_items) >= 3:
+            job_data['company_name'] = element_text(list_items[0]) or MISSING
+            nombre_postes = re.search(r'\d+', element_text(list_items[1]))
+            job_data['nombre_postes'] = nombre_postes.group() if nombre_postes else MISSING
+            contract_span = next(list_items[1].iter('span'), None)
+            if contract_span is not None:
+                job_data['statut_CDD_CDI'] = element_text(contract_span) or MISSING
+                job_data['statut_poste'] = job_data['statut_CDD_CDI']
+            job_data['location'] = element_text(list_items[2]) or MISSING
+
+    if salary_heading is not None:
+        salary_span = next_sibling_tag(salary_heading, 'span')
+        if salary_span is not None:
+            salary_value = element_text(salary_span)
+            job_data['salary_raw'] = salary_value if salary_value and "À négocier" not in salary_value else MISSING
+
+    if ref_offre_div is not None:
+        ref_match = re.search(r'Ref\. Apec :\s*(\S+)', element_text(ref_offre_div))
+        if ref_match:
+            job_data['reference_apec'] = ref_match.group(1)
+
+    if date_offre_div is not None:
+        date_match = re.search(r'Publiée le\s*(\d+/\d+/\d+)', element_text(date_offre_div))
+        if date_match:
+            job_data['date_publication'] = date_match.group(1)
+
+    for heading, field in HEADING_FIELDS.items():
+        value_span = next_sibling_tag(headings[heading], 'span') if heading in headings else None
+        if value_span is not None:
+            job_data[field] = element_text(value_span) or MISSING
+
+    if langues_heading is not None:
+        job_data['langues'] = parse_languages(langues_heading)
+
+    if 'Descriptif du poste' in headings:
+        job_data['description'] = parse_description(headings['Descriptif du poste'])
+
+    return job_data
+
+
+# Liens vers les fiches de poste d'une page de résultats
+def parse_offer_links(html_content, base_url):
+    return set(parse_offer_link_list(html_content, base_url))
+
+
+# Mêmes liens, dans l'ordre d'affichage (utile quand les résultats sont triés par date)
+def parse_offer_link_list(html_content, base_url):
+    root = lxml.html.fromstring(html_content)
+    return list(dict.fromkeys(urljoin(base_url, href) for href in root.xpath(LISTING_LINKS_XPATH)))
@@ -0,0 +1,109 @@
+from typing import Optional
+
+OFFER_FIELDS = ['company_name', 'nombre_postes', 'statut_CDD_CDI', 'statut_poste', 'location', 'ville', 'departement', 'salary_raw', 'salary_average', 'salary_minimum', 'reference_apec', 'date_publication', 'mois_publication', 'experience', 'experience_value', 'travel_zone', 'langues', 'metier', 'secteur_activite', 'teletravail', 'description']
+
+# Ancienne valeur des champs absents, encore présente dans les journaux et bases existants
+LEGACY_MISSING = '.'
+
+RECORD_FIELDS = tuple(OFFER_FIELDS) + ('url', 'content_hash')
+
+# Champs numériques calculés après coup (voir offer_normalize) ; tous les autres sont du texte
+NUMERIC_FIELDS = {
+    'departement': int,
+    'salary_average': float,
+    'salary_minimum': int,
+    'mois_publication': int,
+    'experience_value': int,
+}
+
+
+# Offre d'emploi : un attribut par champ, None pour une valeur absente.
+# Les __slots__ évitent le dictionnaire par instance ; get() et l'accès par clé
+# permettent de l'utiliser là où un dictionnaire d'offre était attendu.
+class OfferRecord:
+    __slots__ = RECORD_FIELDS
+
+    company_name: Optional[str]
+    nombre_postes: Optional[str]
+    statut_CDD_CDI: Optional[str]
+    statut_poste: Optional[str]
+    location: Optional[str]
+    ville: Optional[str]
+    departement: Optional[int]
+    salary_raw: Optional[str]
+    salary_average: Optional[float]
+    salary_minimum: Optional[int]
+    reference_apec: Optional[str]
+    date_publication: Optional[str]
+    mois_publication: Optional[int]
+    experience: Optional[str]
+    experience_value: Optional[int]
+    travel_zone: Optional[str]
+    langues: Optional[str]
+    metier: Optional[str]
+    secteur_activite: Optional[str]
+    teletravail: Optional[str]
+    description: Optional[str]
+    url: Optional[str]
+    content_hash: Optional[str]
+
+    def __init__(self, **fields):
+        for field in RECORD_FIELDS:
+            setattr(self, field, fields.pop(field, None))
+        if fields:
+            raise TypeError(f"Champs inconnus : {', '.join(fields)}")
+
+    # Offre lue depuis un journal JSON ou une ligne de base : les anciens marqueurs '.' deviennent None
+    @classmethod
+    def from_dict(cls, data):
+        record = cls.__new__(cls)
+        for field in RECORD_FIELDS:
+            value = data.get(field)
+            setattr(record, field, None if value == LEGACY_MISSING else value)
+        return record
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in RECORD_FIELDS}
+
+    def get(self, field, default=None):
+        value = getattr(self, field, None) if field in RECORD_FIELDS else None
+        return default if value is None else value
+
+    def __getitem__(self, field):
+        if field not in RECORD_FIELDS:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __setitem__(self, field, value):
+        if field not in RECORD_FIELDS:
+            raise KeyError(field)
+        setattr(self, field, value)
+
+    def keys(self):
+        return RECORD_FIELDS
+
+    def items(self):
+        return ((field, getattr(self, field)) for field in RECORD_FIELDS)
+
+    # État compact pour le passage entre processus : un tuple de valeurs, sans les noms de champs
+    def __getstate__(self):
+        return tuple(getattr(self, field) for field in RECORD_FIELDS)
+
+    def __setstate__(self, state):
+        for field, value in zip(RECORD_FIELDS, state):
+            setattr(self, field, value)
+
+    def __eq__(self, other):
+        if not isinstance(other, OfferRecord):
+            return NotImplemented
+        return self.__getstate__() == other.__getstate__()
+
+    def __repr__(self):
+        return f"OfferRecord(reference_apec={self.reference_apec!r}, company_name={self.company_name!r})"
+
+
+# Sérialisation JSON des offres (json.dumps(..., default=record_to_json))
+def record_to_json(value):
+    if isinstance(value, OfferRecord):
+        return value.to_dict()
+    raise TypeError(f"Type non sérialisable : {type(value).__name__}")
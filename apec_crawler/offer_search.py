@@ -0,0 +1,131 @@
+import sqlite3
+import time
+
+# Colonnes filtrables et comptées par la recherche, chacune avec son index
+FACET_COLUMNS = ['metier', 'secteur_activite', 'departement', 'teletravail']
+# Colonnes couvertes par l'index plein texte
+TEXT_COLUMNS = ['description', 'metier', 'company_name']
+
+
+def fts5_available(conn):
+    try:
+        conn.execute('CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(text)')
+        conn.execute('DROP TABLE temp.fts5_probe')
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+# Index de recherche de job_offers : index secondaires sur les facettes et table FTS5
+# à contenu externe, tenue à jour par des triggers à chaque insertion, remplacement ou suppression
+def ensure_search_schema(conn):
+    for column in FACET_COLUMNS:
+        conn.execute(f'CREATE INDEX IF NOT EXISTS idx_job_offers_{column} ON job_offers ({column})')
+
+    # INSERT OR REPLACE supprime l'ancienne ligne sans déclencher le trigger de suppression,
+    # sauf avec recursive_triggers (réglage propre à la connexion)
+    conn.execute('PRAGMA recursive_triggers = ON')
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'job_offers_fts'").fetchone()
+    if not exists:
+        if not fts5_available(conn):
+            print("FTS5 n'est pas disponible dans cette version de SQLite : la recherche plein texte est désactivée.")
+            conn.commit()
+            return
+        columns = ', '.join(TEXT_COLUMNS)
+        new_values = ', '.join(f'new.{column}' for column in TEXT_COLUMNS)
+        old_values = ', '.join(f'old.{column}' for column in TEXT_COLUMNS)
+        # Les accents sont ignorés : "ingenieur" trouve "Ingénieur"
+        conn.execute(f'''CREATE VIRTUAL TABLE job_offers_fts USING fts5({columns}, content='job_offers', content_rowid='rowid',
+                         tokenize='unicode61 remove_diacritics 2')''')
+        conn.execute(f'''CREATE TRIGGER job_offers_fts_insert AFTER INSERT ON job_offers BEGIN
+                             INSERT INTO job_offers_fts (rowid, {columns}) VALUES (new.rowid, {new_values});
+                         END''')
+        conn.execute(f'''CREATE TRIGGER job_offers_fts_delete AFTER DELETE ON job_offers BEGIN
+                             INSERT INTO job_offers_fts (job_offers_fts, rowid, {columns}) VALUES ('delete', old.rowid, {old_values});
+                         END''')
+        conn.execute(f'''CREATE TRIGGER job_offers_fts_update AFTER UPDATE ON job_offers BEGIN
+                             INSERT INTO job_offers_fts (job_offers_fts, rowid, {columns}) VALUES ('delete', old.rowid, {old_values});
+                             INSERT INTO job_offers_fts (rowid, {columns}) VALUES (new.rowid, {new_values});
+                         END''')
+        # Base existante : indexer les offres déjà enregistrées
+        conn.execute("INSERT INTO job_offers_fts (job_offers_fts) VALUES ('rebuild')")
+    conn.commit()
+
+
+# Recherche dans job_offers.db : mots de la description, du métier ou de l'entreprise
+# (syntaxe FTS5 : "data AND python", "ingénieur*", ...) et filtres d'égalité sur les facettes
+class OfferSearch:
+    def __init__(self, db_path):
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.has_fts = self.conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'job_offers_fts'").fetchone() is not None
+        self.last_duration = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    # Clause WHERE commune : texte et filtres (une valeur ou une liste de valeurs par facette)
+    def _where(self, text, filters):
+        clauses, parameters = [], []
+        if text:
+            if self.has_fts:
+                clauses.append('job_offers.rowid IN (SELECT rowid FROM job_offers_fts WHERE job_offers_fts MATCH ?)')
+                parameters.append(text)
+            else:
+                clauses.append('job_offers.description LIKE ?')
+                parameters.append(f'%{text}%')
+        for column, value in filters.items():
+            if column not in FACET_COLUMNS:
+                raise ValueError(f"Facette inconnue : {column}")
+            if isinstance(value, (list, tuple, set)):
+                clauses.append(f"job_offers.{column} IN ({', '.join('?' for _ in value)})")
+                parameters.extend(value)
+            else:
+                clauses.append(f'job_offers.{column} = ?')
+                parameters.append(value)
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', parameters
+
+    def _execute(self, sql, parameters):
+        start = time.perf_counter()
+        rows = self.conn.execute(sql, parameters).fetchall()
+        self.last_duration = time.perf_counter() - start
+        return rows
+
+    # Offres correspondantes, les plus pertinentes d'abord lorsqu'un texte est cherché
+    def search(self, text=None, limit=50, offset=0, columns=('ref_apec', 'company_name', 'metier', 'secteur_activite', 'departement', 'teletravail', 'date_publication', 'url'), **filters):
+        selected = ', '.join(f'job_offers.{column}' for column in columns)
+        if text and self.has_fts:
+            where, parameters = self._where(None, filters)
+            where = ' WHERE job_offers_fts MATCH ?' + where.replace(' WHERE ', ' AND ', 1)
+            sql = f'''SELECT {selected} FROM job_offers_fts JOIN job_offers ON job_offers.rowid = job_offers_fts.rowid
+                      {where} ORDER BY bm25(job_offers_fts) LIMIT ? OFFSET ?'''
+            parameters = [text] + parameters + [limit, offset]
+        else:
+            where, parameters = self._where(text, filters)
+            sql = f'SELECT {selected} FROM job_offers{where} LIMIT ? OFFSET ?'
+            parameters = parameters + [limit, offset]
+        return [dict(row) for row in self._execute(sql, parameters)]
+
+    def count(self, text=None, **filters):
+        where, parameters = self._where(text, filters)
+        return self._execute(f'SELECT COUNT(*) FROM job_offers{where}', parameters)[0][0]
+
+    # Nombre d'offres par valeur de chaque facette, pour la même recherche
+    def facet_counts(self, text=None, facets=FACET_COLUMNS, limit=20, **filters):
+        where, parameters = self._where(text, filters)
+        counts = {}
+        for column in facets:
+            if column not in FACET_COLUMNS:
+                raise ValueError(f"Facette inconnue : {column}")
+            rows = self._execute(f'''SELECT {column}, COUNT(*) AS offers FROM job_offers{where}
+                                     GROUP BY {column} ORDER BY offers DESC LIMIT ?''', parameters + [limit])
+            counts[column] = [(row[0], row[1]) for row in rows]
+        return counts
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
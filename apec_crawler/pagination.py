@@ -0,0 +1,204 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .fetchers import FetchError, GONE_STATUS_CODES
+from .offer_parser import parse_offer_links, parse_offer_link_list
+from .offer_index import ref_from_url
+
+# Liens des offres et bouton "page suivante" sur une page de résultats
+LISTING_SELECTOR = 'div.container-result a[queryparamshandling="merge"]'
+NEXT_PAGE_SELECTOR = 'li.page-item.next a.page-link'
+
+
+# Délai d'attente ajusté sur les temps de chargement observés (moyenne mobile exponentielle)
+class AdaptiveTimeout:
+    def __init__(self, initial=10.0, minimum=2.0, maximum=30.0, factor=3.0, smoothing=0.3):
+        self.average = initial / factor
+        self.minimum = minimum
+        self.maximum = maximum
+        self.factor = factor
+        self.smoothing = smoothing
+
+    @property
+    def value(self):
+        return min(self.maximum, max(self.minimum, self.average * self.factor))
+
+    def observe(self, duration):
+        self.average = self.smoothing * duration + (1 - self.smoothing) * self.average
+
+
+# Lien de la première offre affichée, ou None si la liste est absente ou en cours de remplacement
+def first_offer_href(driver):
+    from selenium.webdriver.common.by import By
+    from selenium.common.exceptions import StaleElementReferenceException
+
+    try:
+        elements = driver.find_elements(By.CSS_SELECTOR, LISTING_SELECTOR)
+        return elements[0].get_attribute('href') if elements else None
+    except StaleElementReferenceException:
+        return None
+
+
+# Attendre que la liste de résultats soit remplacée par celle de la page suivante
+def wait_for_results_change(driver, previous_href, adaptive_timeout):
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.common.exceptions import TimeoutException
+
+    start = time.monotonic()
+    try:
+        WebDriverWait(driver, adaptive_timeout.value, poll_frequency=0.1).until(
+            lambda d: (first_offer_href(d) or previous_href) != previous_href)
+    except TimeoutException:
+        # Le délai est allongé pour la page suivante avant d'abandonner
+        adaptive_timeout.observe(adaptive_timeout.maximum / adaptive_timeout.factor)
+        raise
+    adaptive_timeout.observe(time.monotonic() - start)
+
+
+# Parcours des résultats dans un seul navigateur, en cliquant sur "page suivante".
+# Chaque clic est suivi d'une attente du changement effectif de la liste, sans pause fixe.
+def get_offer_links_by_click(driver):
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import NoSuchElementException, TimeoutException, StaleElementReferenceException
+
+    offer_links = set()
+    adaptive_timeout = AdaptiveTimeout()
+
+    while True:
+        try:
+            # Attendre que les éléments chargent
+            WebDriverWait(driver, 10).until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, LISTING_SELECTOR)))
+
+            # Récupérer les liens des offres sur la page actuelle
+            offer_elements = driver.find_elements(By.CSS_SELECTOR, LISTING_SELECTOR)
+            print("Nombre d'éléments trouvés sur la page actuelle :", len(offer_elements))
+
+            for offer_element in offer_elements:
+                try:
+                    offer_links.add(offer_element.get_attribute('href'))
+                except StaleElementReferenceException:
+                    continue
+
+            # Cliquer sur le bouton de la page suivante s'il existe
+            try:
+                next_page_button = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.CSS_SELECTOR, NEXT_PAGE_SELECTOR)))
+
+                # Amener le bouton dans la zone visible sans animation, puis cliquer
+                driver.execute_script("arguments[0].scrollIntoView({block: 'center', inline: 'nearest'});", next_page_button)
+                previous_href = first_offer_href(driver)
+                next_page_button.click()
+                print("Cliquer sur le bouton de la page suivante")
+
+                # Attendre que la première offre de la liste change
+                wait_for_results_change(driver, previous_href, adaptive_timeout)
+
+            except TimeoutException:
+                print("Le bouton de la page suivante n'a pas été trouvé ou la page suivante ne s'est pas chargée.")
+                break
+            except NoSuchElementException:
+                print("Pas de bouton de la page suivante trouvé, sortie de la boucle.")
+                break
+            except Exception as e:
+                print(f"Erreur lors du clic sur le bouton de la page suivante : {str(e)}")
+
+        except TimeoutException:
+            print("Impossible de charger les éléments sur la page actuelle.")
+            break
+
+    return offer_links
+
+
+# Fermer la bannière de consentement des cookies lorsque le profil du navigateur ne l'a pas déjà fait
+def click_cookie_banner(driver, timeout=10):
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import TimeoutException
+
+    try:
+        WebDriverWait(driver, timeout).until(EC.element_to_be_clickable((By.ID, 'onetrust-accept-btn-handler'))).click()
+        print("Cookies acceptés.")
+    except TimeoutException:
+        print("La bannière de consentement des cookies n'a pas été trouvée.")
+
+
+# Parcours direct des pages de résultats (?page=N), plusieurs pages à la fois.
+# Le parcours s'arrête à la première page vide ou ne contenant que des offres déjà vues.
+# Une page illisible n'arrête pas le parcours : elle est inscrite dans les pages abandonnées
+# par l'ordonnanceur et relue à l'exécution suivante. Une page inexistante (404, 410) compte
+# comme une page vide ; si toutes les pages d'un lot sont illisibles, le site est jugé indisponible.
+def get_offer_links_by_page(url_template, fetcher, start_page=0, max_pages=None, workers=4):
+    offer_links = set()
+
+    def fetch_page(page_number):
+        url = url_template.format(page_number=page_number)
+        try:
+            return parse_offer_links(fetcher.fetch(url), url)
+        except FetchError as e:
+            print(f"Impossible de récupérer la page de résultats {page_number} : {str(e)}")
+            return set() if e.status_code in GONE_STATUS_CODES else None
+
+    page_number = start_page
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while max_pages is None or page_number < start_page + max_pages:
+            batch_size = workers if max_pages is None else min(workers, start_page + max_pages - page_number)
+            batch = range(page_number, page_number + batch_size)
+            batch_links = list(executor.map(fetch_page, batch))
+            if all(page_links is None for page_links in batch_links):
+                print(f"Pages de résultats {batch[0]} à {batch[-1]} illisibles, parcours interrompu.")
+                return offer_links
+            for current_page, page_links in zip(batch, batch_links):
+                if page_links is None:
+                    continue
+                new_links = page_links - offer_links
+                print(f"Page {current_page} : {len(page_links)} offres trouvées.")
+                if not new_links:
+                    return offer_links
+                offer_links |= new_links
+            page_number += batch_size
+
+    return offer_links
+
+
+# Parcours "depuis la dernière exécution" des résultats triés du plus récent au plus ancien.
+# Le parcours s'arrête après la page contenant le repère de l'exécution précédente (l'offre
+# la plus récente vue alors), ou dès qu'une page entière ne contient que des offres connues.
+# Renvoie les liens nouveaux dans l'ordre d'affichage et le nouveau repère.
+def get_offer_links_since(url_template, fetcher, is_known, high_water_ref=None, start_page=0, max_pages=None, workers=2):
+    offer_links = []
+    seen = set()
+    newest_ref = None
+
+    def fetch_page(page_number):
+        url = url_template.format(page_number=page_number)
+        try:
+            return parse_offer_link_list(fetcher.fetch(url), url)
+        except FetchError as e:
+            print(f"Impossible de récupérer la page de résultats {page_number} : {str(e)}")
+            return None
+
+    page_number = start_page
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while max_pages is None or page_number < start_page + max_pages:
+            batch_size = workers if max_pages is None else min(workers, start_page + max_pages - page_number)
+            batch = range(page_number, page_number + batch_size)
+            for current_page, page_links in zip(batch, executor.map(fetch_page, batch)):
+                # Une page illisible ne permet pas de savoir où reprendre : le repère n'est pas avancé
+                if page_links is None:
+                    return offer_links, None
+                if not page_links:
+                    return offer_links, newest_ref
+                if newest_ref is None:
+                    newest_ref = ref_from_url(page_links[0])
+
+                new_links = [link for link in page_links if link not in seen and not is_known(link)]
+                seen.update(page_links)
+                offer_links.extend(new_links)
+                reached_mark = high_water_ref is not None and any(ref_from_url(link) == high_water_ref for link in page_links)
+                print(f"Page {current_page} : {len(page_links)} offres, {len(new_links)} nouvelles.")
+                if reached_mark or not new_links:
+                    return offer_links, newest_ref
+            page_number += batch_size
+
+    return offer_links, newest_ref
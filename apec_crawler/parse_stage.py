@@ -0,0 +1,106 @@
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from .offer_index import content_hash
+from .offer_parser import parse_offer
+from .metrics import metrics, timed_call
+
+# Marque de fin envoyée dans la file quand toutes les pages ont été récupérées
+_FETCH_DONE = object()
+
+
+# Pool de processus d'analyse. Les processus sont créés au premier envoi, quand les threads de
+# récupération et du serveur de mesures tournent déjà : un fork pourrait copier un verrou tenu
+# par l'un d'eux (celui de la sortie standard, ...), ils sont donc lancés par forkserver (spawn sous Windows).
+def parse_process_pool(max_workers):
+    start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(start_method))
+
+
+# Analyse d'une page dans un processus de travail ; doit rester au niveau du module pour être picklable
+def parse_offer_page(offer_link, html_content):
+    try:
+        job_data = parse_offer(html_content)
+    except Exception as e:
+        print(f"Erreur lors de l'analyse de l'offre {offer_link} : {str(e)}")
+        return None
+    job_data['url'] = offer_link
+    job_data['content_hash'] = content_hash(job_data)
+    return job_data
+
+
+# Pipeline en deux étages : des threads ne font que récupérer le HTML brut,
+# un pool de processus le transforme en offres. La file bornée entre les deux
+# bloque les threads de récupération quand l'analyse prend du retard.
+class ParsePipeline:
+    def __init__(self, fetcher, parse_function=parse_offer_page, fetch_workers=10, parse_workers=None, queue_size=100):
+        self.fetcher = fetcher
+        self.parse_function = parse_function
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.fetch_errors = 0
+
+    def _fetch(self, offer_link, raw_pages, stopped):
+        if stopped.is_set():
+            return
+        try:
+            html_content = self.fetcher.fetch(offer_link)
+        except Exception as e:
+            self.fetch_errors += 1
+            metrics.inc('fetch_failures_total')
+            print(f"Une erreur s'est produite lors de la récupération de l'offre {offer_link} : {str(e)}")
+            return
+        raw_pages.put((offer_link, html_content))
+
+    def _feed(self, fetch_pool, offer_links, raw_pages, stopped):
+        try:
+            futures = [fetch_pool.submit(self._fetch, offer_link, raw_pages, stopped) for offer_link in offer_links]
+            wait(futures)
+        finally:
+            raw_pages.put(_FETCH_DONE)
+
+    # Générateur des offres analysées, dans l'ordre où elles sont prêtes
+    def run(self, offer_links):
+        raw_pages = queue.Queue(maxsize=self.queue_size)
+        stopped = threading.Event()
+        max_in_flight = self.parse_workers * 2
+
+        with ThreadPoolExecutor(max_workers=self.fetch_workers) as fetch_pool, parse_process_pool(self.parse_workers) as parse_pool:
+            feeder = threading.Thread(target=self._feed, args=(fetch_pool, offer_links, raw_pages, stopped), daemon=True)
+            feeder.start()
+            pending = set()
+            try:
+                while True:
+                    item = raw_pages.get()
+                    if item is _FETCH_DONE:
+                        break
+                    pending.add(parse_pool.submit(timed_call, self.parse_function, *item))
+                    metrics.set_gauge('queue_depth', raw_pages.qsize(), queue='raw_pages')
+                    metrics.set_gauge('queue_depth', len(pending), queue='parse_in_flight')
+                    if len(pending) >= max_in_flight:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        yield from self._results(done)
+
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    yield from self._results(done)
+            finally:
+                # Arrêt anticipé : libérer les threads bloqués sur la file pleine
+                stopped.set()
+                while feeder.is_alive():
+                    try:
+                        raw_pages.get(timeout=0.1)
+                    except queue.Empty:
+                        pass
+
+    @staticmethod
+    def _results(done):
+        for future in done:
+            job_data, elapsed, error_type = future.result()
+            metrics.record_call('parse', elapsed, error_type)
+            if job_data:
+                metrics.inc('offers_total')
+                yield job_data
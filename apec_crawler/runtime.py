@@ -0,0 +1,102 @@
+from functools import partial
+from .driver_pool import DriverPool, LEAN_PROFILE, create_firefox_driver
+from .fetchers import HttpFetcher, SeleniumFetcher, FallbackFetcher, FetchError, OFFER_READY_SELECTOR, OFFER_READY_MARKER
+from .fetch_scheduler import FetchScheduler, read_dead_letters, drop_dead_letters
+from .html_cache import HtmlCache, CachingFetcher
+from .metrics import metrics, TimedFetcher
+from .offer_index import ref_from_url
+from .offer_parser import parse_offer_links
+from .pagination import LISTING_SELECTOR
+
+
+# Ressources partagées d'une exécution : ordonnanceur, cache HTML et pool de navigateurs.
+# Le pool (et donc Selenium) n'est créé qu'au premier backend qui en a besoin.
+class CrawlRuntime:
+    def __init__(self, config):
+        self.config = config
+        self.fetch_scheduler = FetchScheduler(rate_per_host=config.rate_per_host, max_retries=config.max_retries,
+                                              dead_letter_path=config.dead_letter_file, target_latency=config.target_latency)
+        self._html_cache = None
+        self._driver_pool = None
+        self._dead_letters_read = []
+        if config.metrics_port:
+            metrics.serve(config.metrics_port)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def html_cache(self):
+        if self._html_cache is None:
+            self._html_cache = HtmlCache(self.config.html_cache_dir, ttl=self.config.html_cache_ttl, max_bytes=self.config.html_cache_max_bytes)
+        return self._html_cache
+
+    @property
+    def driver_pool(self):
+        if self._driver_pool is None:
+            self._driver_pool = DriverPool(size=self.config.concurrency, driver_factory=partial(create_firefox_driver, profile=self.browser_profile))
+        return self._driver_pool
+
+    # Profil des navigateurs : allégé, cookies acceptés d'avance (None : navigateur complet)
+    @property
+    def browser_profile(self):
+        return LEAN_PROFILE if self.config.lean_browser else None
+
+    # Backend de récupération des pages de détail (par défaut) ou de résultats (cache_kind='liste').
+    # Chaque page récupérée est enregistrée dans le cache HTML ; seules les pages de détail
+    # y sont relues, et seulement avec config.cache_reads.
+    def create_fetcher(self, backend, ready_selector=OFFER_READY_SELECTOR, ready_marker=OFFER_READY_MARKER, cache_kind='offre'):
+        if backend == 'http':
+            fetcher = HttpFetcher(pool_size=self.config.concurrency, ready_marker=ready_marker)
+        elif backend == 'selenium':
+            fetcher = SeleniumFetcher(self.driver_pool, ready_selector=ready_selector, target_latency=self.config.browser_target_latency)
+        else:
+            fetcher = FallbackFetcher(HttpFetcher(pool_size=self.config.concurrency, ready_marker=ready_marker),
+                                      SeleniumFetcher(self.driver_pool, ready_selector=ready_selector, target_latency=self.config.browser_target_latency))
+        stage = 'detail_fetch' if cache_kind == 'offre' else 'listing_fetch'
+        # Le débit est réglé par l'ordonnanceur, pas par les appelants
+        return CachingFetcher(TimedFetcher(self.fetch_scheduler.wrap(fetcher), stage), self.html_cache, kind=cache_kind, use_cached=cache_kind == 'offre' and self.config.cache_reads)
+
+    def detail_fetcher(self):
+        return self.create_fetcher(self.config.backend)
+
+    def listing_fetcher(self):
+        return self.create_fetcher(self.config.listing_backend, ready_selector=LISTING_SELECTOR, ready_marker='container-result', cache_kind='liste')
+
+    # Liens des offres abandonnées lors des exécutions précédentes ; les pages de résultats
+    # abandonnées sont relues pour en extraire les liens. Le fichier n'est pas vidé ici :
+    # appeler drop_retried_dead_letters une fois ces offres enregistrées.
+    def dead_letter_links(self):
+        urls, self._dead_letters_read = read_dead_letters(self.config.dead_letter_file)
+        offer_links = [url for url in urls if ref_from_url(url)]
+        listing_urls = [url for url in urls if not ref_from_url(url)]
+        if listing_urls:
+            listing_fetcher = self.listing_fetcher()
+            for url in listing_urls:
+                try:
+                    offer_links.extend(parse_offer_links(listing_fetcher.fetch(url), url))
+                except FetchError as e:
+                    # La page est de nouveau inscrite dans le fichier par l'ordonnanceur
+                    print(f"Impossible de relire la page de résultats {url} : {str(e)}")
+        return list(dict.fromkeys(offer_links))
+
+    def drop_retried_dead_letters(self):
+        drop_dead_letters(self.config.dead_letter_file, self._dead_letters_read)
+        self._dead_letters_read = []
+
+    # Fermeture des navigateurs et du cache, puis résumé des pages abandonnées et des mesures
+    def close(self):
+        if self._driver_pool is not None:
+            self._driver_pool.close()
+            self._driver_pool = None
+        if self._html_cache is not None:
+            self._html_cache.close()
+            self._html_cache = None
+        if self.fetch_scheduler.dead_letters:
+            print(f"{len(self.fetch_scheduler.dead_letters)} pages abandonnées, enregistrées dans {self.config.dead_letter_file} pour la prochaine exécution.")
+        metrics.write_summary(self.config.metrics_summary_file)
+        print(f"Résumé des mesures enregistré dans {self.config.metrics_summary_file}.")
+        metrics.stop()
@@ -0,0 +1,175 @@
+import glob
+import json
+import os
+import socket
+import sqlite3
+import time
+
+
+# Identifiant d'un nœud de crawl : machine et processus
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+# File de plages de pages partagée par plusieurs processus ou machines (base SQLite
+# sur un disque commun). Une plage est prêtée pour une durée limitée : si le nœud
+# qui la traite disparaît, elle est reprise par un autre à l'expiration du bail.
+# Une plage reprise max_attempts fois sans être terminée est déclarée en échec.
+class ShardQueue:
+    def __init__(self, db_path, lease_seconds=900, max_attempts=5):
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS page_ranges
+                     (start_page INTEGER PRIMARY KEY, end_page INTEGER, status TEXT DEFAULT 'pending', owner TEXT, lease_expires REAL, next_page INTEGER, attempts INTEGER DEFAULT 0, completed_at REAL)''')
+        # Nœud chargé de fusionner les journaux, une fois toutes les plages terminées
+        self.conn.execute('CREATE TABLE IF NOT EXISTS queue_state (name TEXT PRIMARY KEY, owner TEXT, claimed_at REAL)')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    # Découper [first_page, last_page] en plages ; sans effet sur les plages déjà créées
+    def create_ranges(self, first_page, last_page, range_size=50):
+        with self._transaction():
+            for start_page in range(first_page, last_page + 1, range_size):
+                end_page = min(start_page + range_size - 1, last_page)
+                self.conn.execute('INSERT OR IGNORE INTO page_ranges (start_page, end_page, next_page) VALUES (?, ?, ?)',
+                                  (start_page, end_page, start_page))
+
+    def _transaction(self):
+        return _ImmediateTransaction(self.conn)
+
+    # Réserver la prochaine plage libre ou dont le bail a expiré ; renvoie (première page à traiter, dernière page)
+    def claim(self, worker_id):
+        now = time.time()
+        with self._transaction():
+            self.conn.execute('''UPDATE page_ranges SET status = 'failed', owner = NULL, lease_expires = NULL
+                                 WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?''', (now, self.max_attempts))
+            row = self.conn.execute('''SELECT start_page, end_page, next_page FROM page_ranges
+                                       WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?)
+                                       ORDER BY start_page LIMIT 1''', (now,)).fetchone()
+            if row is None:
+                return None
+            start_page, end_page, next_page = row
+            self.conn.execute('''UPDATE page_ranges SET status = 'leased', owner = ?, lease_expires = ?, attempts = attempts + 1
+                                 WHERE start_page = ?''', (worker_id, now + self.lease_seconds, start_page))
+        return start_page, next_page, end_page
+
+    # Prolonger le bail et mémoriser la progression dans la plage ; False si la plage a été reprise
+    def renew(self, worker_id, start_page, next_page=None):
+        with self._transaction():
+            cursor = self.conn.execute('''UPDATE page_ranges SET lease_expires = ?, next_page = COALESCE(?, next_page)
+                                          WHERE start_page = ? AND owner = ? AND status = 'leased' ''',
+                                       (time.time() + self.lease_seconds, next_page, start_page, worker_id))
+            return cursor.rowcount == 1
+
+    def complete(self, worker_id, start_page):
+        with self._transaction():
+            cursor = self.conn.execute('''UPDATE page_ranges SET status = 'done', lease_expires = NULL, completed_at = ?
+                                          WHERE start_page = ? AND owner = ?''', (time.time(), start_page, worker_id))
+            return cursor.rowcount == 1
+
+    # Nombre de plages par état
+    def status(self):
+        counts = {'pending': 0, 'leased': 0, 'done': 0, 'failed': 0}
+        for status, count in self.conn.execute('SELECT status, COUNT(*) FROM page_ranges GROUP BY status'):
+            counts[status] = count
+        return counts
+
+    def is_finished(self):
+        status = self.status()
+        return status['pending'] == 0 and status['leased'] == 0 and status['done'] + status['failed'] > 0
+
+    # Secondes avant l'expiration du plus proche bail en cours (None s'il n'y en a pas)
+    def next_lease_expiry(self):
+        row = self.conn.execute("SELECT MIN(lease_expires) FROM page_ranges WHERE status = 'leased'").fetchone()
+        return None if row[0] is None else max(0.0, row[0] - time.time())
+
+    # Réserver la fusion des journaux : True pour un seul nœud, et seulement une fois toutes les plages terminées
+    def claim_merge(self, worker_id):
+        with self._transaction():
+            if not self.is_finished():
+                return False
+            cursor = self.conn.execute("INSERT OR IGNORE INTO queue_state (name, owner, claimed_at) VALUES ('merge', ?, ?)",
+                                       (worker_id, time.time()))
+            return cursor.rowcount == 1
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+# BEGIN IMMEDIATE : le verrou d'écriture est pris dès le début, deux nœuds ne peuvent pas réserver la même plage
+class _ImmediateTransaction:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+
+
+# Boucle d'un nœud : réserver une plage, la parcourir, la déclarer terminée, recommencer.
+# crawl_range(first_page, last_page, on_progress) doit appeler on_progress(page suivante)
+# après chaque suite de pages terminée ; le bail est prolongé à cette occasion.
+# Si crawl_range renvoie False, la plage n'est pas déclarée terminée.
+# Tant que d'autres nœuds détiennent des plages, le nœud attend (au plus poll_interval secondes
+# entre deux essais) : une plage dont le nœud a disparu est reprise à l'expiration de son bail.
+def run_shard_worker(shard_queue, crawl_range, worker_id=None, poll_interval=30):
+    worker_id = worker_id or default_worker_id()
+    ranges_done = 0
+    while True:
+        claimed = shard_queue.claim(worker_id)
+        if claimed is None:
+            next_expiry = shard_queue.next_lease_expiry()
+            if next_expiry is None:
+                break
+            delay = min(poll_interval, next_expiry + 1)
+            print(f"[{worker_id}] Plages en cours sur d'autres nœuds, nouvel essai dans {delay:.0f} s.")
+            time.sleep(delay)
+            continue
+        start_page, next_page, end_page = claimed
+        print(f"[{worker_id}] Plage {start_page}-{end_page} réservée (reprise à la page {next_page}).")
+
+        def on_progress(page_number, start_page=start_page):
+            if not shard_queue.renew(worker_id, start_page, page_number):
+                print(f"[{worker_id}] Le bail de la plage {start_page} a expiré, elle a été reprise par un autre nœud.")
+
+        # Plage incomplète (pages illisibles) : elle reste réservée et sera reprise
+        # à la page suivante non terminée lorsque le bail expirera
+        if crawl_range(next_page, end_page, on_progress) is False:
+            print(f"[{worker_id}] Plage {start_page}-{end_page} incomplète, elle sera reprise à l'expiration du bail.")
+            continue
+        if shard_queue.complete(worker_id, start_page):
+            ranges_done += 1
+    return ranges_done
+
+
+# Fusionner les journaux de plusieurs nœuds en éliminant les doublons sur reference_apec
+def merge_results(log_paths, key='reference_apec'):
+    seen = set()
+    for log_path in log_paths:
+        with open(log_path, 'r', encoding='utf-8') as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                record_key = record.get(key)
+                if record_key and record_key != '.':
+                    if record_key in seen:
+                        continue
+                    seen.add(record_key)
+                yield record
+
+
+# Journaux produits par les nœuds dans un répertoire de résultats commun
+def result_logs(results_dir):
+    return sorted(glob.glob(os.path.join(results_dir, '*.jsonl')))
@@ -0,0 +1,193 @@
+import csv
+import os
+from .db_writer import BulkWriter
+from .offer_history import OfferHistory
+from .metrics import metrics
+from .offer_record import NUMERIC_FIELDS
+
+
+# Nom du fichier pour la n-ième partie d'un export découpé : offres.csv, offres_2.csv, ...
+def part_path(path, part):
+    if part == 1:
+        return path
+    root, extension = os.path.splitext(path)
+    return f"{root}_{part}{extension}"
+
+
+# Base des exports fichier : les offres sont écrites une à une, et un nouveau fichier
+# est ouvert lorsque max_rows lignes ont été écrites dans le fichier courant.
+# Le premier fichier n'est créé qu'à la première offre : un export vide n'écrase rien.
+class RotatingFileSink:
+    def __init__(self, path, fields, max_rows=None):
+        self.path = path
+        self.fields = fields
+        self.max_rows = max_rows
+        self.part = 0
+        self.rows_in_part = 0
+        self.paths = []
+
+    def _open_next_part(self):
+        self.part += 1
+        self.rows_in_part = 0
+        path = part_path(self.path, self.part)
+        self.paths.append(path)
+        self._open(path)
+
+    def write(self, job_data):
+        if not self.part:
+            self._open_next_part()
+        elif self.max_rows and self.rows_in_part >= self.max_rows:
+            self._close()
+            self._open_next_part()
+        self._write(job_data)
+        self.rows_in_part += 1
+
+    def close(self):
+        if self.part:
+            self._close()
+
+    def _open(self, path):
+        raise NotImplementedError
+
+    def _write(self, job_data):
+        raise NotImplementedError
+
+    def _close(self):
+        raise NotImplementedError
+
+
+# Export CSV
+class CsvSink(RotatingFileSink):
+    stage = 'csv_write'
+
+    def _open(self, path):
+        self._file = open(path, mode='w', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fields, extrasaction='ignore')
+        self._writer.writeheader()
+
+    def _write(self, job_data):
+        self._writer.writerow(job_data)
+
+    def _close(self):
+        self._file.close()
+
+
+# Export Excel en mode écriture seule : les lignes ne sont pas gardées en mémoire
+class XlsxSink(RotatingFileSink):
+    stage = 'excel_write'
+    # Limite d'une feuille Excel, en-tête compris
+    EXCEL_MAX_ROWS = 1048575
+
+    def __init__(self, path, fields, max_rows=EXCEL_MAX_ROWS):
+        super().__init__(path, fields, min(max_rows or self.EXCEL_MAX_ROWS, self.EXCEL_MAX_ROWS))
+
+    def _open(self, path):
+        from openpyxl import Workbook
+        self._current_path = path
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet()
+        self._sheet.append(self.fields)
+
+    def _write(self, job_data):
+        self._sheet.append([job_data.get(field) for field in self.fields])
+
+    def _close(self):
+        self._workbook.save(self._current_path)
+
+
+# Export Parquet compressé pour les traitements analytiques, écrit par groupes de lignes
+class ParquetSink(RotatingFileSink):
+    stage = 'parquet_write'
+
+    def __init__(self, path, fields, max_rows=None, row_group_size=10000, compression='zstd'):
+        self.row_group_size = row_group_size
+        self.compression = compression
+        super().__init__(path, fields, max_rows)
+
+    def _open(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self._pa = pa
+        # Champs dérivés en colonnes numériques, le reste en texte ; None donne une valeur nulle
+        numeric_types = {int: pa.int64(), float: pa.float64()}
+        self._schema = pa.schema([(field, numeric_types[NUMERIC_FIELDS[field]] if field in NUMERIC_FIELDS else pa.string()) for field in self.fields])
+        self._writer = pq.ParquetWriter(path, self._schema, compression=self.compression)
+        self._columns = {field: [] for field in self.fields}
+        self._buffered = 0
+
+    def _write(self, job_data):
+        for field in self.fields:
+            value = job_data.get(field)
+            self._columns[field].append(value if value is None or field in NUMERIC_FIELDS else str(value))
+        self._buffered += 1
+        if self._buffered >= self.row_group_size:
+            self._flush_row_group()
+
+    def _flush_row_group(self):
+        if self._buffered:
+            self._writer.write_table(self._pa.table(self._columns, schema=self._schema))
+            self._columns = {field: [] for field in self.fields}
+            self._buffered = 0
+
+    def _close(self):
+        self._flush_row_group()
+        self._writer.close()
+
+
+# Écriture dans job_offers.db par lots transactionnels
+class SqliteSink:
+    stage = 'db_write'
+
+    def __init__(self, db_path, **writer_options):
+        self.writer = BulkWriter(db_path, **writer_options)
+
+    def write(self, job_data):
+        self.writer.add(job_data)
+
+    def close(self):
+        self.writer.close()
+
+
+# Historique des versions de chaque offre dans job_offers.db (seuls les changements sont écrits)
+class HistorySink:
+    stage = 'history_write'
+
+    def __init__(self, db_path, **history_options):
+        self.history = OfferHistory(db_path, **history_options)
+
+    def write(self, job_data):
+        self.history.add(job_data)
+
+    def close(self):
+        self.history.close()
+        stats = self.history.stats
+        print(f"Historique : {stats['new']} nouvelles offres, {stats['changed']} modifiées, {stats['unchanged']} inchangées, {stats['reappeared']} revenues.")
+
+
+# Diffuser chaque offre vers tous les exports dès qu'elle est disponible
+class SinkPipeline:
+    def __init__(self, sinks):
+        self.sinks = sinks
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, job_data):
+        for sink in self.sinks:
+            with metrics.timed(sink.stage):
+                sink.write(job_data)
+        self.count += 1
+
+    def write_all(self, job_data_list):
+        for job_data in job_data_list:
+            self.write(job_data)
+        return self.count
+
+    def close(self):
+        for sink in self.sinks:
+            with metrics.timed(sink.stage):
+                sink.close()
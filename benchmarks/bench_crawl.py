@@ -0,0 +1,219 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+sys.path.insert(0, BENCHMARKS_DIR)
+from mock_apec import MockApecSite
+
+BACKENDS = ('http', 'selenium', 'fallback')
+PIPELINES = ('async', 'threads')
+LISTING_READY_MARKER = 'container-result'
+
+
+# Backend de récupération à mesurer, pour les pages de résultats et les pages d'offre
+def create_fetchers(backend, concurrency, lean_browser=True):
+    from apec_crawler.fetchers import HttpFetcher, SeleniumFetcher, FallbackFetcher, OFFER_READY_MARKER
+    from apec_crawler.pagination import LISTING_SELECTOR
+
+    driver_pool = None
+    if backend != 'http':
+        from apec_crawler.driver_pool import DriverPool, BrowserProfile, create_firefox_driver
+        # Le site de substitution n'affiche pas de bannière : pas de consentement à enregistrer sur apec.fr
+        profile = BrowserProfile(accept_cookies=False) if lean_browser else None
+        driver_pool = DriverPool(size=concurrency, driver_factory=lambda: create_firefox_driver(profile=profile))
+    if backend == 'http':
+        listing_fetcher = HttpFetcher(pool_size=concurrency, ready_marker=LISTING_READY_MARKER)
+        detail_fetcher = HttpFetcher(pool_size=concurrency, ready_marker=OFFER_READY_MARKER)
+    elif backend == 'selenium':
+        listing_fetcher = SeleniumFetcher(driver_pool, ready_selector=LISTING_SELECTOR)
+        detail_fetcher = SeleniumFetcher(driver_pool)
+    else:
+        listing_fetcher = FallbackFetcher(HttpFetcher(pool_size=concurrency, ready_marker=LISTING_READY_MARKER), SeleniumFetcher(driver_pool, ready_selector=LISTING_SELECTOR))
+        detail_fetcher = FallbackFetcher(HttpFetcher(pool_size=concurrency, ready_marker=OFFER_READY_MARKER), SeleniumFetcher(driver_pool))
+    return listing_fetcher, detail_fetcher, driver_pool
+
+
+# Mémorise l'heure de début de récupération de chaque offre pour mesurer sa latence de bout en bout
+class StartTimeFetcher:
+    def __init__(self, fetcher):
+        self.fetcher = fetcher
+        self.started = {}
+        self._lock = threading.Lock()
+
+    def fetch(self, url):
+        with self._lock:
+            self.started.setdefault(url, time.perf_counter())
+        return self.fetcher.fetch(url)
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+# Crawl complet d'une configuration : pages de résultats, pages d'offre, analyse et exports CSV/SQLite.
+# Exécuté dans un processus dédié pour que le pic de mémoire mesuré ne concerne que cette configuration.
+def run_crawl(config):
+    from apec_crawler.fetch_scheduler import FetchScheduler
+    from apec_crawler.offer_normalize import normalize_records
+    from apec_crawler.offer_record import OFFER_FIELDS
+    from apec_crawler.sinks import CsvSink, SqliteSink, SinkPipeline
+
+    listing_fetcher, detail_fetcher, driver_pool = create_fetchers(config['backend'], config['concurrency'], config['lean_browser'])
+    # Les erreurs injectées sont relancées comme sur apec.fr, avec des attentes courtes
+    scheduler = FetchScheduler(rate_per_host=config['rate'], max_rate=config['rate'], max_retries=config['max_retries'], backoff_base=0.05, backoff_max=1.0)
+    listing_fetcher = scheduler.wrap(listing_fetcher)
+    detail_fetcher = StartTimeFetcher(scheduler.wrap(detail_fetcher))
+    latencies = []
+
+    def record_latency(job_data):
+        latencies.append(time.perf_counter() - detail_fetcher.started[job_data['url']])
+        return job_data
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        sinks = [CsvSink(os.path.join(output_dir, 'offres.csv'), OFFER_FIELDS), SqliteSink(os.path.join(output_dir, 'job_offers.db'))]
+        start = time.perf_counter()
+        with SinkPipeline(sinks) as pipeline:
+            if config['pipeline'] == 'async':
+                from apec_crawler.async_crawler import AsyncCrawler
+                from apec_crawler.offer_parser import parse_offer_links
+                from apec_crawler.parse_stage import parse_offer_page
+
+                # Comme le mode full : les offres sont conservées pendant le crawl, puis exportées
+                records = []
+                crawler = AsyncCrawler(
+                    lambda url: parse_offer_links(listing_fetcher.fetch(url), url),
+                    detail_fetcher.fetch,
+                    concurrency=config['concurrency'],
+                    parse_offer=parse_offer_page,
+                    parse_workers=config['parse_workers'],
+                )
+                pages = [(page_number, config['search_page_url'].format(page_number=page_number)) for page_number in range(config['pages'])]
+                crawler.run(pages, lambda job_data: records.append(record_latency(job_data)))
+                pipeline.write_all(normalize_records(records))
+            else:
+                from apec_crawler.pagination import get_offer_links_by_page
+                from apec_crawler.parse_stage import ParsePipeline
+
+                # Comme le mode daily : les offres sont exportées au fil de l'eau
+                offer_links = get_offer_links_by_page(config['search_page_url'], listing_fetcher, workers=4)
+                parse_pipeline = ParsePipeline(detail_fetcher, fetch_workers=config['concurrency'], parse_workers=config['parse_workers'])
+                pipeline.write_all(normalize_records(map(record_latency, parse_pipeline.run(sorted(offer_links)))))
+        elapsed = time.perf_counter() - start
+
+    if driver_pool is not None:
+        driver_pool.close()
+
+    # ru_maxrss est en kio sous Linux
+    return {
+        'offers': len(latencies),
+        'seconds': round(elapsed, 3),
+        'offers_per_second': round(len(latencies) / elapsed, 2) if elapsed else None,
+        'p50_latency_ms': round(percentile(latencies, 0.5) * 1000, 1) if latencies else None,
+        'p99_latency_ms': round(percentile(latencies, 0.99) * 1000, 1) if latencies else None,
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'peak_child_rss_mb': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+        'dead_letters': len(scheduler.dead_letters),
+    }
+
+
+def config_name(config):
+    return f"{config['pipeline']}/{config['backend']}/c{config['concurrency']}"
+
+
+# Lancer une configuration dans un sous-processus ; le résultat est la dernière ligne de sa sortie
+def run_isolated(config):
+    completed = subprocess.run([sys.executable, os.path.abspath(__file__), '--run-config', json.dumps(config)],
+                               capture_output=True, text=True)
+    if completed.returncode != 0:
+        return {'error': (completed.stderr.strip().splitlines() or ['erreur inconnue'])[-1]}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def print_results(results, baseline=None):
+    print(f"{'configuration':<26} {'offres':>7} {'offres/s':>9} {'p50 (ms)':>9} {'p99 (ms)':>9} {'RSS (Mo)':>9} {'RSS fils':>9} {'abandons':>9}")
+    for name, result in results.items():
+        if 'error' in result:
+            print(f"{name:<26} erreur : {result['error']}")
+            continue
+        line = (f"{name:<26} {result['offers']:>7} {result['offers_per_second']:>9} {result['p50_latency_ms']:>9} {result['p99_latency_ms']:>9} "
+                f"{result['peak_rss_mb']:>9} {result['peak_child_rss_mb']:>9} {result['dead_letters']:>9}")
+        reference = (baseline or {}).get(name)
+        if reference and reference.get('offers_per_second'):
+            line += f"  x{result['offers_per_second'] / reference['offers_per_second']:.2f} par rapport à la référence"
+        print(line)
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(description="Crawls complets contre un site APEC de substitution local")
+    argument_parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=['http'])
+    argument_parser.add_argument('--pipelines', nargs='+', choices=PIPELINES, default=list(PIPELINES))
+    argument_parser.add_argument('--concurrency', nargs='+', type=int, default=[5, 10, 20])
+    argument_parser.add_argument('--pages', type=int, default=20)
+    argument_parser.add_argument('--offers-per-page', type=int, default=20)
+    argument_parser.add_argument('--latency', type=float, default=0.05, help="latence moyenne par requête (s)")
+    argument_parser.add_argument('--jitter', type=float, default=0.02, help="variation de latence (s)")
+    argument_parser.add_argument('--failure-rate', type=float, default=0.0, help="part des requêtes en erreur")
+    argument_parser.add_argument('--failure-status', type=int, default=503)
+    argument_parser.add_argument('--seed', type=int, default=0)
+    argument_parser.add_argument('--rate', type=float, default=1000.0, help="débit maximal par hôte (requêtes/s)")
+    argument_parser.add_argument('--max-retries', type=int, default=4)
+    argument_parser.add_argument('--parse-workers', type=int, default=None)
+    argument_parser.add_argument('--full-browser', action='store_true', help="navigateur complet au lieu du profil allégé")
+    argument_parser.add_argument('--output', help="fichier JSON où enregistrer les résultats")
+    argument_parser.add_argument('--baseline', help="résultats JSON d'une exécution précédente à comparer")
+    argument_parser.add_argument('--run-config', help=argparse.SUPPRESS)
+    args = argument_parser.parse_args()
+
+    if args.run_config:
+        print(json.dumps(run_crawl(json.loads(args.run_config))))
+        return
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as file:
+            baseline = json.load(file)['results']
+
+    results = {}
+    for pipeline in args.pipelines:
+        for backend in args.backends:
+            for concurrency in args.concurrency:
+                # Un site neuf par configuration : même suite de latences et d'erreurs pour toutes
+                with MockApecSite(args.pages, args.offers_per_page, args.latency, args.jitter, args.failure_rate, args.failure_status, args.seed) as site:
+                    config = {
+                        'pipeline': pipeline,
+                        'backend': backend,
+                        'concurrency': concurrency,
+                        'pages': args.pages,
+                        'search_page_url': site.search_page_url() + '?page={page_number}',
+                        'rate': args.rate,
+                        'max_retries': args.max_retries,
+                        'parse_workers': args.parse_workers,
+                        'lean_browser': not args.full_browser,
+                    }
+                    name = config_name(config)
+                    print(f"{name} : {site.total_offers} offres...", flush=True)
+                    results[name] = run_isolated(config)
+
+    print(f"\n{args.pages} pages de {args.offers_per_page} offres, latence {args.latency * 1000:.0f} ms ± {args.jitter * 1000:.0f} ms, {args.failure_rate:.0%} d'erreurs")
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump({'settings': {key: value for key, value in vars(args).items() if key not in ('output', 'baseline', 'run_config')}, 'results': results},
+                      file, ensure_ascii=False, indent=2)
+        print(f"Résultats enregistrés dans {args.output}")
+
+
+if __name__ == '__main__':
+    main()
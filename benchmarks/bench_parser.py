@@ -0,0 +1,225 @@
+import argparse
+import glob
+import os
+import sys
+import time
+from bs4 import BeautifulSoup
+import re
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from apec_crawler.offer_parser import parse_offer
+from apec_crawler.offer_normalize import normalize_records
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Champs comparés entre les deux implémentations
+COMPARED_FIELDS = ['company_name', 'statut_poste', 'location', 'ville', 'departement', 'salary_raw', 'salary_average', 'salary_minimum', 'reference_apec', 'date_publication', 'mois_publication', 'experience', 'experience_value', 'travel_zone', 'langues', 'metier', 'secteur_activite', 'teletravail', 'description']
+
+
+# Référence : analyse BeautifulSoup de process_offer_details (Scraping24hours.py) avant parse_offer
+def legacy_parse_offer(html_content):
+    soup = BeautifulSoup(html_content, 'html.parser')
+
+    # Récupération des données de chaque offre
+    job_data = {
+        'company_name': '.',
+        'statut_poste': '.',
+        'location': '.',
+        'ville': '.',
+        'departement': '.',
+        'salary_raw': '.',
+        'salary_average': '.',
+        'salary_minimum': '.',
+        'reference_apec': '.',
+        'date_publication': '.',
+        'mois_publication': '.',
+        'experience': '.',
+        'experience_value': '.',
+        'travel_zone': '.',
+        'langues': '.',
+        'metier': '.',
+        'secteur_activite': '.',
+        'teletravail': '.',
+        'description': '.'
+    }
+
+    details_list = soup.find('ul', class_='details-offer-list mb-20')
+    if details_list:
+        list_items = details_list.find_all('li')
+        if len(list_items) >= 3:
+            job_data['company_name'] = list_items[0].get_text(strip=True) or '.'
+            job_data['statut_poste'] = list_items[1].find('span').get_text(strip=True) if list_items[1].find('span') else '.'
+            job_data['location'] = list_items[2].get_text(strip=True) or '.'
+            if re.search(r'.*- \d{2}$', job_data['location']):
+                location_text = job_data['location']
+                job_data['ville'], job_data['departement'] = location_text.split(' - ')
+                job_data['departement'] = int(job_data['departement'])
+
+    salary_div = soup.find('div', class_='details-post')
+    if salary_div:
+        salary_header = salary_div.find('h4', string='Salaire')
+        if salary_header:
+            salary_value = salary_header.find_next_sibling('span').get_text(strip=True) or '.'
+            job_data['salary_raw'] = salary_value
+
+            if " - " in salary_value:
+                salary_range = salary_value.split(' - ')
+                if len(salary_range) == 2:
+                    try:
+                        min_salary = re.sub(r'[^\d]', '', salary_range[0]).strip()
+                        max_salary = re.sub(r'[^\d]', '', salary_range[1]).strip()
+                        if min_salary and max_salary:
+                            min_salary = int(min_salary)
+                            max_salary = int(max_salary)
+                            job_data['salary_average'] = (min_salary + max_salary) / 2
+                    except ValueError:
+                        print(f"Erreur de conversion pour la fourchette de salaire : {salary_range}")
+            elif "A partir de" in salary_value:
+                try:
+                    min_salary_match = re.search(r'\d+', salary_value)
+                    if min_salary_match:
+                        min_salary = min_salary_match.group(0)
+                        if min_salary:
+                            job_data['salary_minimum'] = int(min_salary)
+                except ValueError:
+                    print(f"Erreur de conversion pour le salaire minimum : {salary_value}")
+            elif "À négocier" in salary_value:
+                job_data['salary_raw'] = '.'
+            elif " k€ brut annuel" in salary_value:
+                try:
+                    salary_value = salary_value.replace(' k€ brut annuel', '')
+                    salary_range = salary_value.split(' - ')
+                    if len(salary_range) == 1:
+                        job_data['salary_minimum'] = int(salary_range[0])
+                    elif len(salary_range) == 2:
+                        job_data['salary_average'] = (int(salary_range[0]) + int(salary_range[1])) / 2
+                except ValueError:
+                    print(f"Erreur de conversion pour le format de salaire : {salary_value}")
+
+            ref_offre_div = soup.find('div', class_='ref-offre')
+    if ref_offre_div:
+        ref_offre_text = ref_offre_div.get_text(strip=True)
+        if 'Ref. Apec :' in ref_offre_text:
+            job_data['reference_apec'] = ref_offre_text.split('Ref. Apec :')[1].strip().split(' ')[0] or '.'
+
+    date_offre_div = soup.find('div', class_='date-offre mb-10')
+    if date_offre_div:
+        date_offre_text = date_offre_div.get_text(strip=True)
+        if 'Publiée le' in date_offre_text:
+                            job_data['date_publication'] = date_offre_text.split('Publiée le ')[1] or '.'
+
+    if job_data['date_publication'] != '.':
+        job_data['mois_publication'] = int(job_data['date_publication'].split('/')[1])
+
+    experience_tag = soup.find('h4', string='Expérience')
+    if experience_tag:
+        experience_text = experience_tag.find_next_sibling('span').get_text(strip=True) or '.'
+        job_data['experience'] = experience_text
+        match = re.search(r'\d+', experience_text)
+        if match:
+            job_data['experience_value'] = int(match.group())
+        else:
+            job_data['experience_value'] = '.'
+
+    travel_zone_tag = soup.find('h4', string='Zone de déplacement')
+    if travel_zone_tag:
+        job_data['travel_zone'] = travel_zone_tag.find_next_sibling('span').get_text(strip=True) or '.'
+
+    statut_tag = soup.find('h4', string='Statut du poste')
+    if statut_tag:
+        statut_text = statut_tag.find_next_sibling('span').get_text(strip=True) or '.'
+        job_data['statut_poste'] = statut_text
+
+    langues_section = soup.find('h5', string='Langues')
+    if langues_section:
+        parent_div = langues_section.find_parent('div', class_='flex-collapse')
+        if parent_div:
+            langues_structure = parent_div.find_all('div', class_='added-skills-language')
+            langues_list = []
+            for structure in langues_structure:
+                langues_elements = structure.find_all('div', class_='infos_skills')
+                for element in langues_elements:
+                    langue = element.find('p').get_text(strip=True) or '.'
+                    niveau_tag = element.find_next_sibling('apec-competence-tooltip-niveau')
+                    if niveau_tag:
+                        niveau = niveau_tag.find('h4').get_text(strip=True) or '.'
+                        langues_list.append(f"{langue} ({niveau})")
+            if langues_list:
+                job_data['langues'] = ', '.join(langues_list)
+
+    metier_tag = soup.find('h4', string='Métier')
+    if metier_tag:
+        job_data['metier'] = metier_tag.find_next_sibling('span').get_text(strip=True) or '.'
+
+    secteur_activite_tag = soup.find('h4', string='Secteur d’activité du poste')
+    if secteur_activite_tag:
+        job_data['secteur_activite'] = secteur_activite_tag.find_next_sibling('span').get_text(strip=True) or '.'
+
+    teletravail_tag = soup.find('h4', string='Télétravail')
+    if teletravail_tag:
+        job_data['teletravail'] = teletravail_tag.find_next_sibling('span').get_text(strip=True) or '.'
+    else:
+        job_data['teletravail'] = '.'
+
+    description_tag = soup.find('h4', string='Descriptif du poste')
+    if description_tag:
+        next_element = description_tag.find_next_sibling()
+        description_parts = []
+        while next_element and next_element.name != 'h4' and next_element.get_text(strip=True) != 'Profil recherché':
+            description_parts.append(next_element.get_text(strip=True) or '.')
+            next_element = next_element.find_next_sibling()
+        job_data['description'] = ' '.join(description_parts)
+    return job_data
+
+
+def load_fixtures(pattern):
+    fixtures = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, pattern))):
+        with open(path, 'r', encoding='utf-8') as file:
+            fixtures[os.path.basename(path)] = file.read()
+    return fixtures
+
+
+def time_parser(parser, html_pages, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for html_content in html_pages:
+            parser(html_content)
+    return (time.perf_counter() - start) / (repeat * len(html_pages))
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(description="Comparaison de parse_offer avec l'analyse BeautifulSoup d'origine")
+    argument_parser.add_argument('--repeat', type=int, default=200)
+    argument_parser.add_argument('--pattern', default='offre_*.html')
+    args = argument_parser.parse_args()
+
+    fixtures = load_fixtures(args.pattern)
+    if not fixtures:
+        sys.exit(f"Aucune page trouvée dans {FIXTURES_DIR}")
+
+    # Vérifier que les deux implémentations extraient les mêmes valeurs
+    differences = 0
+    names = list(fixtures)
+    normalized = normalize_records(parse_offer(html_content) for html_content in fixtures.values())
+    for name, actual in zip(names, normalized):
+        expected = legacy_parse_offer(fixtures[name])
+        for field in COMPARED_FIELDS:
+            # L'ancienne analyse marque les champs absents par '.', la nouvelle par None
+            if (None if expected[field] == '.' else expected[field]) != actual[field]:
+                differences += 1
+                print(f"{name} : {field} diffère ({expected[field]!r} != {actual[field]!r})")
+
+    html_pages = list(fixtures.values())
+    legacy_time = time_parser(legacy_parse_offer, html_pages, args.repeat)
+    lxml_time = time_parser(parse_offer, html_pages, args.repeat)
+
+    print(f"{len(html_pages)} pages, {args.repeat} répétitions")
+    print(f"BeautifulSoup (html.parser) : {legacy_time * 1000:.3f} ms/page")
+    print(f"parse_offer (lxml)          : {lxml_time * 1000:.3f} ms/page")
+    print(f"Accélération                : x{legacy_time / lxml_time:.1f}")
+    print(f"Champs différents           : {differences}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+import argparse
+import glob
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+SEARCH_PATH = '/candidat/recherche-emploi.html/emploi'
+DETAIL_PATH = SEARCH_PATH + '/detail-offre/'
+FIRST_REFERENCE = 170000000
+
+
+# Site APEC de substitution : pages de résultats générées à partir de liste_resultats.html,
+# pages d'offre reprises des pages enregistrées avec une référence propre à chaque offre.
+# La latence et les erreurs sont injectées de façon reproductible (graine fixe).
+class MockApecSite:
+    def __init__(self, pages=50, offers_per_page=20, latency=0.0, latency_jitter=0.0, failure_rate=0.0, failure_status=503, seed=0, fixtures_dir=FIXTURES_DIR):
+        self.pages = pages
+        self.offers_per_page = offers_per_page
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+
+        with open(os.path.join(fixtures_dir, 'liste_resultats.html'), 'r', encoding='utf-8') as file:
+            self.listing_template = file.read()
+        # Pages d'offre enregistrées : la référence d'origine est remplacée à chaque réponse
+        self.offer_templates = []
+        for path in sorted(glob.glob(os.path.join(fixtures_dir, 'offre_*.html'))):
+            reference = re.search(r'offre_([^.]+)\.html$', path).group(1)
+            with open(path, 'r', encoding='utf-8') as file:
+                self.offer_templates.append((reference, file.read()))
+        self._server = None
+
+    @property
+    def total_offers(self):
+        return self.pages * self.offers_per_page
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    # URL de la page de résultats n (numérotées à partir de 0, comme sur apec.fr)
+    def search_page_url(self, page_number=None):
+        url = self.base_url + SEARCH_PATH
+        return url if page_number is None else f"{url}?page={page_number}"
+
+    def offer_path(self, offer_number):
+        return f"{DETAIL_PATH}{FIRST_REFERENCE + offer_number}W"
+
+    def listing_page(self, page_number):
+        first_offer = page_number * self.offers_per_page
+        offer_numbers = range(first_offer, first_offer + self.offers_per_page) if 0 <= page_number < self.pages else []
+        links = '\n'.join(f'    <div class="card-offer"><a queryparamshandling="merge" href="{self.offer_path(offer_number)}">Offre {offer_number}</a></div>'
+                          for offer_number in offer_numbers)
+        next_page = ''
+        if page_number + 1 < self.pages:
+            next_page = f'      <li class="page-item next"><a class="page-link" href="{SEARCH_PATH}?page={page_number + 1}">Suivant</a></li>'
+        return self.listing_template.replace('<!-- OFFRES -->', links).replace('<!-- PAGE_SUIVANTE -->', next_page)
+
+    def offer_page(self, reference):
+        match = re.fullmatch(r'(\d+)W', reference)
+        if match is None:
+            return None
+        offer_number = int(match.group(1)) - FIRST_REFERENCE
+        if not 0 <= offer_number < self.total_offers:
+            return None
+        original_reference, html_content = self.offer_templates[offer_number % len(self.offer_templates)]
+        return html_content.replace(original_reference, reference)
+
+    # Latence à appliquer et statut d'erreur éventuel pour la prochaine requête
+    def _draw(self):
+        with self._lock:
+            self.requests += 1
+            delay = max(0.0, self.latency + self._random.uniform(-self.latency_jitter, self.latency_jitter))
+            failed = self._random.random() < self.failure_rate
+            if failed:
+                self.failures += 1
+        return delay, failed
+
+    def respond(self, path):
+        delay, failed = self._draw()
+        if delay:
+            time.sleep(delay)
+        if failed:
+            return self.failure_status, None
+
+        parts = urlsplit(path)
+        if parts.path.startswith(DETAIL_PATH):
+            html_content = self.offer_page(parts.path[len(DETAIL_PATH):])
+        elif parts.path == SEARCH_PATH:
+            page_number = int(parse_qs(parts.query).get('page', ['0'])[0])
+            html_content = self.listing_page(page_number)
+        else:
+            html_content = None
+        return (404, None) if html_content is None else (200, html_content)
+
+    def start(self, port=0, host='127.0.0.1'):
+        site = self
+
+        class MockApecHandler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                status, html_content = site.respond(self.path)
+                data = (html_content or '').encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MockApecHandler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(description="Site APEC de substitution pour les mesures de performance")
+    argument_parser.add_argument('--port', type=int, default=8765)
+    argument_parser.add_argument('--pages', type=int, default=50)
+    argument_parser.add_argument('--offers-per-page', type=int, default=20)
+    argument_parser.add_argument('--latency', type=float, default=0.05, help="latence moyenne par requête (s)")
+    argument_parser.add_argument('--jitter', type=float, default=0.02, help="variation de latence (s)")
+    argument_parser.add_argument('--failure-rate', type=float, default=0.0, help="part des requêtes en erreur")
+    argument_parser.add_argument('--failure-status', type=int, default=503)
+    argument_parser.add_argument('--seed', type=int, default=0)
+    args = argument_parser.parse_args()
+
+    site = MockApecSite(args.pages, args.offers_per_page, args.latency, args.jitter, args.failure_rate, args.failure_status, args.seed)
+    site.start(args.port)
+    print(f"Site de substitution : {site.search_page_url()} ({site.total_offers} offres sur {site.pages} pages)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        site.stop()
+
+
+if __name__ == '__main__':
+    main()
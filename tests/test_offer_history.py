@@ -0,0 +1,49 @@
+import os
+import tempfile
+import unittest
+from apec_crawler.offer_history import OfferHistory
+
+
+def offer(ref_apec='170000001W', company_name='ACME'):
+    return {'reference_apec': ref_apec, 'company_name': company_name, 'description': 'Poste de comptable.'}
+
+
+# Offre close par un parcours complet, puis revue le lendemain
+class OfferReappearsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.history = OfferHistory(os.path.join(self.tmp_dir.name, 'job_offers.db'))
+        self.history.add(offer(), seen_at='2024-05-01T08:00:00')
+        self.history.close_unseen('2024-05-02T08:00:00')
+
+    def tearDown(self):
+        self.history.close()
+        self.tmp_dir.cleanup()
+
+    def test_fetched_again(self):
+        self.history.add(offer(), seen_at='2024-05-03T08:00:00')
+        self.history.flush()
+        versions = self.history.versions('170000001W')
+        self.assertEqual([version['version'] for version in versions], [1, 2])
+        self.assertEqual(versions[0]['valid_to'], '2024-05-02T08:00:00')
+        self.assertIsNone(versions[1]['valid_to'])
+        self.assertEqual(self.history.stats['reappeared'], 1)
+
+    def test_seen_in_listing_only(self):
+        self.history.record_sightings(['170000001W'], '2024-05-03T08:00:00')
+        versions = self.history.versions('170000001W')
+        self.assertEqual([version['version'] for version in versions], [1, 2])
+        self.assertEqual(versions[1]['company_name'], 'ACME')
+        self.assertEqual(versions[1]['description'], 'Poste de comptable.')
+        self.assertIsNone(self.history.as_of('170000001W', '2024-05-02T12:00:00'))
+        self.assertEqual(self.history.as_of('170000001W', '2024-05-03T12:00:00')['version'], 2)
+
+        # Revue une seconde fois : la version rouverte est seulement prolongée
+        self.history.record_sightings(['170000001W'], '2024-05-04T08:00:00')
+        versions = self.history.versions('170000001W')
+        self.assertEqual(len(versions), 2)
+        self.assertEqual(versions[1]['last_seen'], '2024-05-04T08:00:00')
+
+
+if __name__ == '__main__':
+    unittest.main()